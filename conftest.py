@@ -0,0 +1,3 @@
+"""
+Pytest configuration for the Multi-Agent MCP System; puts shared on the import path
+"""
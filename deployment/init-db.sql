@@ -4,6 +4,7 @@
 -- Create extensions
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 CREATE EXTENSION IF NOT EXISTS "pg_trgm";
+CREATE EXTENSION IF NOT EXISTS "vector";
 
 -- Create schemas for different agents
 CREATE SCHEMA IF NOT EXISTS agent1_scraper;
@@ -212,7 +213,7 @@ CREATE INDEX IF NOT EXISTS idx_transformation_jobs_status ON agent4_transformer.
 CREATE INDEX IF NOT EXISTS idx_transformation_jobs_created_at ON agent4_transformer.transformation_jobs(created_at);
 CREATE INDEX IF NOT EXISTS idx_field_mappings_templates ON agent4_transformer.field_mappings(source_template_id, target_template_id);
 
-CREATE INDEX IF NOT EXISTS idx_workflow_executions_workflow_id ON orchestrator.workflow_executions(workflow_id);
+CREATE INDEX IF NOT EXISTS idx_workflow_executions_workflow_started ON orchestrator.workflow_executions(workflow_id, started_at DESC);
 CREATE INDEX IF NOT EXISTS idx_workflow_executions_status ON orchestrator.workflow_executions(status);
 CREATE INDEX IF NOT EXISTS idx_agent_registry_agent_name ON orchestrator.agent_registry(agent_name);
 
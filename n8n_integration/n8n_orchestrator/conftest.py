@@ -0,0 +1,3 @@
+"""
+Pytest configuration for n8n Orchestrator Service; puts src on the import path
+"""
@@ -10,8 +10,12 @@ from src.routes.orchestrator import orchestrator_bp
 from src.routes.workflows import workflows_bp
 from src.routes.webhooks import webhooks_bp
 from src.routes.agents import agents_bp
+from src.services.batch_writer import webhook_call_writer
+from src.utils import fast_json
+from src.utils.fast_json import FastJSONProvider
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+app.json = FastJSONProvider(app)
 app.config['SECRET_KEY'] = 'n8n_orchestrator_secret_key_2025'
 
 # Enable CORS for all routes
@@ -26,9 +30,14 @@ app.register_blueprint(agents_bp, url_prefix='/api/agents')
 # Database configuration
 app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'json_serializer': fast_json.dumps,
+    'json_deserializer': fast_json.loads
+}
 db.init_app(app)
 with app.app_context():
     db.create_all()
+webhook_call_writer.init_app(app)
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
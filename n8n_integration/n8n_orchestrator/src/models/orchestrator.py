@@ -4,10 +4,89 @@ Database models for n8n Orchestrator Service
 
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-import json
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from src.utils import fast_json
 
 db = SQLAlchemy()
 
+# Native JSONB on PostgreSQL, JSON-encoded text elsewhere; values are dicts/lists
+JSONDocument = db.JSON().with_variant(JSONB(), 'postgresql')
+
+class utc_now(FunctionElement):
+    """Current UTC time evaluated by the database, matching datetime.utcnow()"""
+    type = db.DateTime()
+    inherit_cache = True
+
+@compiles(utc_now)
+def _default_utc_now(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+@compiles(utc_now, 'sqlite')
+def _sqlite_utc_now(element, compiler, **kw):
+    # CURRENT_TIMESTAMP only has one-second resolution on SQLite
+    return "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+@compiles(utc_now, 'postgresql')
+def _postgresql_utc_now(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+class seconds_since(FunctionElement):
+    """Seconds elapsed between a naive UTC timestamp column and utc_now()"""
+    type = db.Float()
+    inherit_cache = True
+
+@compiles(seconds_since)
+def _default_seconds_since(element, compiler, **kw):
+    return "((julianday('now') - julianday(%s)) * 86400.0)" % compiler.process(element.clauses, **kw)
+
+@compiles(seconds_since, 'postgresql')
+def _postgresql_seconds_since(element, compiler, **kw):
+    return "EXTRACT(EPOCH FROM (TIMEZONE('utc', CURRENT_TIMESTAMP) - %s))" % compiler.process(element.clauses, **kw)
+
+def _loads_or_text(value):
+    """Decode JSON text, returning the raw text when it is not JSON"""
+    try:
+        return fast_json.loads(value)
+    except ValueError:
+        return value
+
+def _compile_to_dict(fields):
+    """Generate a specialized to_dict method for a model.
+
+    ``fields`` is a list of ``(name, kind, default)`` where kind is None for
+    plain columns, 'datetime' for isoformat output, 'json' for JSON text
+    columns (``default`` is returned when the column is empty) or 'json_or_text'
+    for columns that may also hold raw non-JSON text. The fast path
+    reads loaded values straight from ``__dict__``; expired or deferred
+    instances fall back to attribute access, which loads them.
+    """
+    def render(source):
+        items = []
+        for name, kind, default in fields:
+            value = source(name)
+            if kind == 'datetime':
+                value = f"({value}.isoformat() if {value} else None)"
+            elif kind == 'json':
+                value = f"(fast_json.loads({value}) if {value} else {default!r})"
+            elif kind == 'json_or_text':
+                value = f"(_loads_or_text({value}) if {value} else {default!r})"
+            items.append(f"{name!r}: {value}")
+        return '{' + ', '.join(items) + '}'
+    
+    code = (
+        "def to_dict(self):\n"
+        "    d = self.__dict__\n"
+        "    try:\n"
+        f"        return {render(lambda name: f'd[{name!r}]')}\n"
+        "    except KeyError:\n"
+        f"        return {render(lambda name: f'self.{name}')}\n"
+    )
+    namespace = {'fast_json': fast_json, '_loads_or_text': _loads_or_text}
+    exec(code, namespace)
+    return namespace['to_dict']
+
 class Workflow(db.Model):
     """n8n Workflow model"""
     __tablename__ = 'workflows'
@@ -17,7 +96,7 @@ class Workflow(db.Model):
     name = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     n8n_workflow_id = db.Column(db.String(100))  # ID in n8n system
-    workflow_definition = db.Column(db.Text)  # JSON workflow definition
+    workflow_definition = db.Column(JSONDocument)  # JSON workflow definition
     status = db.Column(db.String(50), default='active')  # active, inactive, error
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -25,51 +104,52 @@ class Workflow(db.Model):
     # Relationships
     executions = db.relationship('WorkflowExecution', backref='workflow', lazy=True, cascade='all, delete-orphan')
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'workflow_id': self.workflow_id,
-            'name': self.name,
-            'description': self.description,
-            'n8n_workflow_id': self.n8n_workflow_id,
-            'workflow_definition': json.loads(self.workflow_definition) if self.workflow_definition else None,
-            'status': self.status,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+    to_dict = _compile_to_dict([
+        ('id', None, None),
+        ('workflow_id', None, None),
+        ('name', None, None),
+        ('description', None, None),
+        ('n8n_workflow_id', None, None),
+        ('workflow_definition', None, None),
+        ('status', None, None),
+        ('created_at', 'datetime', None),
+        ('updated_at', 'datetime', None)
+    ])
 
 class WorkflowExecution(db.Model):
     """Workflow execution tracking"""
     __tablename__ = 'workflow_executions'
+    __table_args__ = (
+        db.Index('idx_workflow_executions_workflow_started', 'workflow_id', 'started_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     execution_id = db.Column(db.String(100), unique=True, nullable=False)
     workflow_id = db.Column(db.String(100), db.ForeignKey('workflows.workflow_id'), nullable=False)
     n8n_execution_id = db.Column(db.String(100))  # ID in n8n system
-    status = db.Column(db.String(50), default='running')  # running, success, error, cancelled
+    status = db.Column(db.String(50), default='running', index=True)  # running, success, error, cancelled
     trigger_type = db.Column(db.String(50))  # webhook, manual, schedule, api
-    trigger_data = db.Column(db.Text)  # JSON trigger data
-    execution_data = db.Column(db.Text)  # JSON execution results
+    trigger_data = db.Column(JSONDocument)  # JSON trigger data
+    execution_data = db.Column(JSONDocument)  # JSON execution results
     error_message = db.Column(db.Text)
     started_at = db.Column(db.DateTime, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime)
     execution_time_seconds = db.Column(db.Float)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'execution_id': self.execution_id,
-            'workflow_id': self.workflow_id,
-            'n8n_execution_id': self.n8n_execution_id,
-            'status': self.status,
-            'trigger_type': self.trigger_type,
-            'trigger_data': json.loads(self.trigger_data) if self.trigger_data else None,
-            'execution_data': json.loads(self.execution_data) if self.execution_data else None,
-            'error_message': self.error_message,
-            'started_at': self.started_at.isoformat() if self.started_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
-            'execution_time_seconds': self.execution_time_seconds
-        }
+    to_dict = _compile_to_dict([
+        ('id', None, None),
+        ('execution_id', None, None),
+        ('workflow_id', None, None),
+        ('n8n_execution_id', None, None),
+        ('status', None, None),
+        ('trigger_type', None, None),
+        ('trigger_data', None, None),
+        ('execution_data', None, None),
+        ('error_message', None, None),
+        ('started_at', 'datetime', None),
+        ('completed_at', 'datetime', None),
+        ('execution_time_seconds', None, None)
+    ])
 
 class Agent(db.Model):
     """Agent registration and status"""
@@ -92,22 +172,21 @@ class Agent(db.Model):
     # Relationships
     tasks = db.relationship('AgentTask', backref='agent', lazy=True, cascade='all, delete-orphan')
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'agent_id': self.agent_id,
-            'name': self.name,
-            'description': self.description,
-            'agent_type': self.agent_type,
-            'base_url': self.base_url,
-            'health_endpoint': self.health_endpoint,
-            'status': self.status,
-            'last_health_check': self.last_health_check.isoformat() if self.last_health_check else None,
-            'capabilities': json.loads(self.capabilities) if self.capabilities else [],
-            'configuration': json.loads(self.configuration) if self.configuration else {},
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+    to_dict = _compile_to_dict([
+        ('id', None, None),
+        ('agent_id', None, None),
+        ('name', None, None),
+        ('description', None, None),
+        ('agent_type', None, None),
+        ('base_url', None, None),
+        ('health_endpoint', None, None),
+        ('status', None, None),
+        ('last_health_check', 'datetime', None),
+        ('capabilities', 'json', []),
+        ('configuration', 'json', {}),
+        ('created_at', 'datetime', None),
+        ('updated_at', 'datetime', None)
+    ])
 
 class AgentTask(db.Model):
     """Agent task tracking"""
@@ -127,22 +206,21 @@ class AgentTask(db.Model):
     completed_at = db.Column(db.DateTime)
     execution_time_seconds = db.Column(db.Float)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'task_id': self.task_id,
-            'agent_id': self.agent_id,
-            'execution_id': self.execution_id,
-            'task_type': self.task_type,
-            'task_data': json.loads(self.task_data) if self.task_data else None,
-            'status': self.status,
-            'result_data': json.loads(self.result_data) if self.result_data else None,
-            'error_message': self.error_message,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'started_at': self.started_at.isoformat() if self.started_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
-            'execution_time_seconds': self.execution_time_seconds
-        }
+    to_dict = _compile_to_dict([
+        ('id', None, None),
+        ('task_id', None, None),
+        ('agent_id', None, None),
+        ('execution_id', None, None),
+        ('task_type', None, None),
+        ('task_data', 'json', None),
+        ('status', None, None),
+        ('result_data', 'json', None),
+        ('error_message', None, None),
+        ('created_at', 'datetime', None),
+        ('started_at', 'datetime', None),
+        ('completed_at', 'datetime', None),
+        ('execution_time_seconds', None, None)
+    ])
 
 class Webhook(db.Model):
     """Webhook configuration"""
@@ -164,25 +242,27 @@ class Webhook(db.Model):
     # Relationships
     calls = db.relationship('WebhookCall', backref='webhook', lazy=True, cascade='all, delete-orphan')
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'webhook_id': self.webhook_id,
-            'name': self.name,
-            'description': self.description,
-            'endpoint_path': self.endpoint_path,
-            'workflow_id': self.workflow_id,
-            'method': self.method,
-            'authentication_type': self.authentication_type,
-            'authentication_config': json.loads(self.authentication_config) if self.authentication_config else {},
-            'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+    to_dict = _compile_to_dict([
+        ('id', None, None),
+        ('webhook_id', None, None),
+        ('name', None, None),
+        ('description', None, None),
+        ('endpoint_path', None, None),
+        ('workflow_id', None, None),
+        ('method', None, None),
+        ('authentication_type', None, None),
+        ('authentication_config', 'json', {}),
+        ('is_active', None, None),
+        ('created_at', 'datetime', None),
+        ('updated_at', 'datetime', None)
+    ])
 
 class WebhookCall(db.Model):
     """Webhook call tracking"""
     __tablename__ = 'webhook_calls'
+    __table_args__ = (
+        db.Index('idx_webhook_calls_webhook_created', 'webhook_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     call_id = db.Column(db.String(100), unique=True, nullable=False)
@@ -198,22 +278,21 @@ class WebhookCall(db.Model):
     user_agent = db.Column(db.String(500))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'call_id': self.call_id,
-            'webhook_id': self.webhook_id,
-            'execution_id': self.execution_id,
-            'method': self.method,
-            'headers': json.loads(self.headers) if self.headers else {},
-            'query_params': json.loads(self.query_params) if self.query_params else {},
-            'body_data': json.loads(self.body_data) if self.body_data else None,
-            'response_status': self.response_status,
-            'response_data': json.loads(self.response_data) if self.response_data else None,
-            'ip_address': self.ip_address,
-            'user_agent': self.user_agent,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    to_dict = _compile_to_dict([
+        ('id', None, None),
+        ('call_id', None, None),
+        ('webhook_id', None, None),
+        ('execution_id', None, None),
+        ('method', None, None),
+        ('headers', 'json', {}),
+        ('query_params', 'json', {}),
+        ('body_data', 'json_or_text', None),
+        ('response_status', None, None),
+        ('response_data', 'json', None),
+        ('ip_address', None, None),
+        ('user_agent', None, None),
+        ('created_at', 'datetime', None)
+    ])
 
 class Configuration(db.Model):
     """System configuration"""
@@ -3,11 +3,11 @@ Agents routes for n8n Integration Service
 """
 
 import uuid
-import json
 import requests
 from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify
 from src.models.orchestrator import db, Agent, AgentTask
+from src.utils import fast_json
 
 agents_bp = Blueprint('agents', __name__)
 
@@ -70,7 +70,7 @@ def create_agent_task(agent_id):
             agent_id=agent_id,
             execution_id=data.get('execution_id'),
             task_type=data['task_type'],
-            task_data=json.dumps(data.get('task_data', {})),
+            task_data=fast_json.dumps(data.get('task_data', {})),
             status='pending'
         )
         
@@ -179,7 +179,7 @@ def _execute_agent_task(task):
         db.session.commit()
         
         # Prepare task data
-        task_data = json.loads(task.task_data) if task.task_data else {}
+        task_data = fast_json.loads(task.task_data) if task.task_data else {}
         
         # Route task based on task type and agent type
         result = _route_agent_task(agent, task.task_type, task_data)
@@ -187,7 +187,7 @@ def _execute_agent_task(task):
         # Update task with results
         if result['success']:
             task.status = 'completed'
-            task.result_data = json.dumps(result.get('data', {}))
+            task.result_data = fast_json.dumps(result.get('data', {}))
         else:
             task.status = 'failed'
             task.error_message = result.get('error', 'Unknown error')
@@ -354,7 +354,7 @@ def get_agent_capabilities(agent_id):
             return jsonify({'error': 'Agent not found'}), 404
         
         # Get capabilities from agent configuration
-        capabilities = json.loads(agent.capabilities) if agent.capabilities else []
+        capabilities = fast_json.loads(agent.capabilities) if agent.capabilities else []
         
         # Define available endpoints based on agent type
         endpoint_map = {
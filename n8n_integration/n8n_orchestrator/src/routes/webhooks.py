@@ -2,15 +2,55 @@
 Webhooks routes for n8n Integration Service
 """
 
-import uuid
-import json
+import time
 import requests
 from datetime import datetime
 from flask import Blueprint, request, jsonify
-from src.models.orchestrator import db, Webhook, WebhookCall, Workflow, WorkflowExecution, Agent
+from requests.adapters import HTTPAdapter
+from src.models.orchestrator import db, Webhook, WebhookCall, Workflow, WorkflowExecution, Agent, utc_now
+from src.services.batch_writer import webhook_call_writer
+from src.services.workflow_definitions import get_workflow_definition
+from src.utils import fast_json
+from src.utils.ids import new_id
+from src.utils.pagination import keyset_page, stream_page
+from src.utils.validation import compile_validator, REQUIRED
 
 webhooks_bp = Blueprint('webhooks', __name__)
 
+# Shared keep-alive session for agent calls so consecutive nodes reuse
+# pooled connections instead of opening one TCP connection per request
+_agent_session = requests.Session()
+_agent_session.mount('http://', HTTPAdapter(pool_connections=16, pool_maxsize=32))
+_agent_session.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=32))
+_agent_session.headers.update({'Content-Type': 'application/json'})
+
+_validate_create_webhook = compile_validator([
+    ('name', str, REQUIRED),
+    ('endpoint_path', str, REQUIRED),
+    ('description', None, ''),
+    ('workflow_id', None, None),
+    ('method', str, 'POST'),
+    ('authentication_type', str, 'none'),
+    ('authentication_config', dict, {})
+])
+
+# Lookup statements built once; per call only the bound values change
+_WEBHOOK_BY_ID = db.select(Webhook).where(Webhook.webhook_id == db.bindparam('webhook_id'))
+_WEBHOOK_CALL_BY_ID = db.select(WebhookCall).where(WebhookCall.call_id == db.bindparam('call_id'))
+_ACTIVE_WEBHOOK_BY_PATH = db.select(Webhook).where(
+    Webhook.endpoint_path == db.bindparam('endpoint_path'),
+    Webhook.is_active.is_(True)
+).limit(1)
+_AGENT_BY_ID = db.select(Agent).where(Agent.agent_id == db.bindparam('agent_id'))
+
+def _get_webhook(webhook_id):
+    """Fetch a webhook by its public id"""
+    return db.session.execute(_WEBHOOK_BY_ID, {'webhook_id': webhook_id}).scalar_one_or_none()
+
+def _get_webhook_call(call_id):
+    """Fetch a webhook call by its public id"""
+    return db.session.execute(_WEBHOOK_CALL_BY_ID, {'call_id': call_id}).scalar_one_or_none()
+
 @webhooks_bp.route('/', methods=['GET'])
 def list_webhooks():
     """List all webhooks"""
@@ -34,27 +74,24 @@ def create_webhook():
         if not data:
             return jsonify({'error': 'Request data is required'}), 400
         
-        # Validate required fields
-        required_fields = ['name', 'endpoint_path']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Field {field} is required'}), 400
+        fields, error = _validate_create_webhook(data)
+        if error:
+            return jsonify({'error': error}), 400
         
         # Check if endpoint path already exists
-        existing_webhook = Webhook.query.filter_by(endpoint_path=data['endpoint_path']).first()
-        if existing_webhook:
+        if db.session.query(Webhook.query.filter_by(endpoint_path=fields['endpoint_path']).exists()).scalar():
             return jsonify({'error': 'Endpoint path already exists'}), 409
         
         # Create webhook
         webhook = Webhook(
-            webhook_id=str(uuid.uuid4()),
-            name=data['name'],
-            description=data.get('description', ''),
-            endpoint_path=data['endpoint_path'],
-            workflow_id=data.get('workflow_id'),
-            method=data.get('method', 'POST'),
-            authentication_type=data.get('authentication_type', 'none'),
-            authentication_config=json.dumps(data.get('authentication_config', {}))
+            webhook_id=new_id(),
+            name=fields['name'],
+            description=fields['description'],
+            endpoint_path=fields['endpoint_path'],
+            workflow_id=fields['workflow_id'],
+            method=fields['method'],
+            authentication_type=fields['authentication_type'],
+            authentication_config=fast_json.dumps(fields['authentication_config'])
         )
         
         db.session.add(webhook)
@@ -72,7 +109,7 @@ def create_webhook():
 def get_webhook(webhook_id):
     """Get a specific webhook"""
     try:
-        webhook = Webhook.query.filter_by(webhook_id=webhook_id).first()
+        webhook = _get_webhook(webhook_id)
         
         if not webhook:
             return jsonify({'error': 'Webhook not found'}), 404
@@ -86,7 +123,7 @@ def get_webhook(webhook_id):
 def update_webhook(webhook_id):
     """Update a webhook"""
     try:
-        webhook = Webhook.query.filter_by(webhook_id=webhook_id).first()
+        webhook = _get_webhook(webhook_id)
         
         if not webhook:
             return jsonify({'error': 'Webhook not found'}), 404
@@ -106,9 +143,9 @@ def update_webhook(webhook_id):
                 setattr(webhook, field, data[field])
         
         if 'authentication_config' in data:
-            webhook.authentication_config = json.dumps(data['authentication_config'])
+            webhook.authentication_config = fast_json.dumps(data['authentication_config'])
         
-        webhook.updated_at = datetime.utcnow()
+        webhook.updated_at = utc_now()
         db.session.commit()
         
         return jsonify({
@@ -123,13 +160,13 @@ def update_webhook(webhook_id):
 def delete_webhook(webhook_id):
     """Delete a webhook"""
     try:
-        webhook = Webhook.query.filter_by(webhook_id=webhook_id).first()
+        webhook = _get_webhook(webhook_id)
         
         if not webhook:
             return jsonify({'error': 'Webhook not found'}), 404
         
         webhook.is_active = False
-        webhook.updated_at = datetime.utcnow()
+        webhook.updated_at = utc_now()
         db.session.commit()
         
         return jsonify({'message': 'Webhook deactivated successfully'})
@@ -143,10 +180,9 @@ def trigger_webhook(endpoint_path):
     """Dynamic webhook trigger endpoint"""
     try:
         # Find webhook by endpoint path
-        webhook = Webhook.query.filter_by(
-            endpoint_path=f"/{endpoint_path}",
-            is_active=True
-        ).first()
+        webhook = db.session.execute(
+            _ACTIVE_WEBHOOK_BY_PATH, {'endpoint_path': f"/{endpoint_path}"}
+        ).scalars().first()
         
         if not webhook:
             return jsonify({'error': 'Webhook not found'}), 404
@@ -160,52 +196,56 @@ def trigger_webhook(endpoint_path):
         if not auth_result['success']:
             return jsonify({'error': auth_result['error']}), 401
         
-        # Create webhook call record
-        call = WebhookCall(
-            call_id=str(uuid.uuid4()),
-            webhook_id=webhook.webhook_id,
-            method=request.method,
-            headers=json.dumps(dict(request.headers)),
-            query_params=json.dumps(dict(request.args)),
-            body_data=json.dumps(request.get_json()) if request.is_json else request.get_data(as_text=True),
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent', '')
-        )
-        
-        db.session.add(call)
-        db.session.flush()  # Get the call ID
+        # Build the webhook call record; it is written by the batching
+        # writer once the response is known, off the request path
+        received_at = datetime.utcnow()
+        call = {
+            'call_id': new_id(),
+            'webhook_id': webhook.webhook_id,
+            'execution_id': None,
+            'method': request.method,
+            'headers': fast_json.dumps(dict(request.headers)),
+            'query_params': fast_json.dumps(dict(request.args)),
+            'body_data': fast_json.dumps(request.get_json()) if request.is_json else request.get_data(as_text=True),
+            'response_status': None,
+            'response_data': None,
+            'ip_address': request.remote_addr,
+            'user_agent': request.headers.get('User-Agent', ''),
+            'created_at': received_at
+        }
         
         try:
             # Execute associated workflow if configured
             if webhook.workflow_id:
-                execution_result = _execute_webhook_workflow(webhook, call, request)
-                call.execution_id = execution_result.get('execution_id')
-                call.response_status = 200
-                call.response_data = json.dumps(execution_result)
-                
+                execution_result = _execute_webhook_workflow(webhook, call['call_id'], request)
                 db.session.commit()
                 
+                call['execution_id'] = execution_result.get('execution_id')
+                call['response_status'] = 200
+                call['response_data'] = fast_json.dumps(execution_result)
+                webhook_call_writer.record(call)
+                
                 return jsonify(execution_result)
             else:
                 # No workflow configured, just return success
                 response_data = {
                     'success': True,
                     'message': 'Webhook received successfully',
-                    'call_id': call.call_id,
-                    'timestamp': datetime.utcnow().isoformat()
+                    'call_id': call['call_id'],
+                    'timestamp': received_at.isoformat()
                 }
                 
-                call.response_status = 200
-                call.response_data = json.dumps(response_data)
-                
-                db.session.commit()
+                call['response_status'] = 200
+                call['response_data'] = fast_json.dumps(response_data)
+                webhook_call_writer.record(call)
                 
                 return jsonify(response_data)
                 
         except Exception as e:
-            call.response_status = 500
-            call.response_data = json.dumps({'error': str(e)})
-            db.session.commit()
+            db.session.rollback()
+            call['response_status'] = 500
+            call['response_data'] = fast_json.dumps({'error': str(e)})
+            webhook_call_writer.record(call)
             
             return jsonify({'error': str(e)}), 500
         
@@ -218,7 +258,7 @@ def _authenticate_webhook(webhook, request):
         if webhook.authentication_type == 'none':
             return {'success': True}
         
-        auth_config = json.loads(webhook.authentication_config) if webhook.authentication_config else {}
+        auth_config = fast_json.loads(webhook.authentication_config) if webhook.authentication_config else {}
         
         if webhook.authentication_type == 'api_key':
             api_key = request.headers.get('X-API-Key') or request.args.get('api_key')
@@ -254,10 +294,13 @@ def _authenticate_webhook(webhook, request):
     except Exception as e:
         return {'success': False, 'error': f'Authentication error: {str(e)}'}
 
-def _execute_webhook_workflow(webhook, call, request):
+def _execute_webhook_workflow(webhook, call_id, request):
     """Execute workflow associated with webhook"""
     try:
-        workflow = Workflow.query.filter_by(workflow_id=webhook.workflow_id).first()
+        # Only the columns needed to validate and key the definition cache
+        workflow = db.session.query(
+            Workflow.workflow_id, Workflow.status, Workflow.updated_at
+        ).filter_by(workflow_id=webhook.workflow_id).first()
         if not workflow:
             raise Exception('Associated workflow not found')
         
@@ -271,31 +314,33 @@ def _execute_webhook_workflow(webhook, call, request):
                 'query_params': dict(request.args),
                 'body': request.get_json() if request.is_json else request.get_data(as_text=True)
             },
-            'call_id': call.call_id,
+            'call_id': call_id,
             'webhook_id': webhook.webhook_id
         }
         
         # Create workflow execution
         execution = WorkflowExecution(
-            execution_id=str(uuid.uuid4()),
+            execution_id=new_id(),
             workflow_id=workflow.workflow_id,
             trigger_type='webhook',
-            trigger_data=json.dumps(trigger_data),
+            trigger_data=trigger_data,
             status='running'
         )
         
         db.session.add(execution)
         db.session.flush()
+        started = time.perf_counter()
         
         # Execute workflow steps
-        workflow_definition = json.loads(workflow.workflow_definition) if workflow.workflow_definition else {}
+        updated_at = workflow.updated_at.isoformat() if workflow.updated_at else None
+        workflow_definition = get_workflow_definition(workflow.workflow_id, updated_at)
         execution_result = _process_workflow_nodes(workflow_definition, trigger_data, execution.execution_id)
         
         # Update execution with results
         execution.status = 'success' if execution_result['success'] else 'error'
-        execution.execution_data = json.dumps(execution_result)
-        execution.completed_at = datetime.utcnow()
-        execution.execution_time_seconds = (execution.completed_at - execution.started_at).total_seconds()
+        execution.execution_data = execution_result
+        execution.completed_at = utc_now()
+        execution.execution_time_seconds = time.perf_counter() - started
         
         if not execution_result['success']:
             execution.error_message = execution_result.get('error', 'Unknown error')
@@ -326,28 +371,18 @@ def _process_workflow_nodes(workflow_definition, trigger_data, execution_id):
         results = {}
         
         for node in nodes:
-            if node.get('type') == 'webhook':
-                # Skip webhook trigger node
-                results[node['id']] = {'success': True, 'data': current_data}
-                continue
+            handler = _NODE_HANDLERS.get(node.get('type'), _skip_node)
+            node_result = handler(node, current_data, execution_id)
+            results[node['id']] = node_result
             
-            elif node.get('type') == 'agent_call':
-                # Call agent endpoint
-                agent_result = _call_agent_node(node, current_data, execution_id)
-                results[node['id']] = agent_result
-                
-                if not agent_result['success']:
-                    return {
-                        'success': False,
-                        'error': f"Node {node['id']} failed: {agent_result.get('error', 'Unknown error')}",
-                        'results': results
-                    }
-                
-                current_data = agent_result.get('data', current_data)
+            if not node_result['success']:
+                return {
+                    'success': False,
+                    'error': f"Node {node['id']} failed: {node_result.get('error', 'Unknown error')}",
+                    'results': results
+                }
             
-            else:
-                # Unknown node type, skip
-                results[node['id']] = {'success': True, 'data': current_data, 'message': f"Skipped unknown node type: {node.get('type')}"}
+            current_data = node_result.get('data', current_data)
         
         return {
             'success': True,
@@ -375,7 +410,7 @@ def _call_agent_node(node, data, execution_id):
             return {'success': False, 'error': 'Agent ID and endpoint are required'}
         
         # Get agent information
-        agent = Agent.query.filter_by(agent_id=agent_id).first()
+        agent = db.session.execute(_AGENT_BY_ID, {'agent_id': agent_id}).scalar_one_or_none()
         if not agent:
             return {'success': False, 'error': f'Agent {agent_id} not found'}
         
@@ -384,15 +419,14 @@ def _call_agent_node(node, data, execution_id):
         
         # Prepare request
         url = f"{agent.base_url.rstrip('/')}{endpoint}"
-        headers = {'Content-Type': 'application/json'}
         
         # Make request to agent
         if method.upper() == 'GET':
-            response = requests.get(url, headers=headers, timeout=30)
+            response = _agent_session.get(url, timeout=30)
         elif method.upper() == 'POST':
-            response = requests.post(url, json=data, headers=headers, timeout=30)
+            response = _agent_session.post(url, json=data, timeout=30)
         elif method.upper() == 'PUT':
-            response = requests.put(url, json=data, headers=headers, timeout=30)
+            response = _agent_session.put(url, json=data, timeout=30)
         else:
             return {'success': False, 'error': f'Unsupported method: {method}'}
         
@@ -411,31 +445,40 @@ def _call_agent_node(node, data, execution_id):
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
+def _webhook_node(node, data, execution_id):
+    """Pass trigger data through the webhook trigger node"""
+    return {'success': True, 'data': data}
+
+def _skip_node(node, data, execution_id):
+    """Skip a node of unknown type"""
+    return {'success': True, 'data': data, 'message': f"Skipped unknown node type: {node.get('type')}"}
+
+# Node type -> handler(node, data, execution_id) -> result dict
+_NODE_HANDLERS = {
+    'webhook': _webhook_node,
+    'agent_call': _call_agent_node
+}
+
 @webhooks_bp.route('/<webhook_id>/calls', methods=['GET'])
 def get_webhook_calls(webhook_id):
     """Get webhook call history"""
     try:
-        webhook = Webhook.query.filter_by(webhook_id=webhook_id).first()
-        
-        if not webhook:
+        if not db.session.query(Webhook.query.filter_by(webhook_id=webhook_id).exists()).scalar():
             return jsonify({'error': 'Webhook not found'}), 404
         
-        page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        cursor = request.args.get('cursor')
         
-        calls = WebhookCall.query.filter_by(webhook_id=webhook_id).order_by(
-            WebhookCall.created_at.desc()
-        ).paginate(page=page, per_page=per_page, error_out=False)
+        # Keyset pagination on (created_at, id): no COUNT(*) over the history
+        try:
+            calls, pagination = keyset_page(
+                WebhookCall.query.filter_by(webhook_id=webhook_id),
+                WebhookCall.created_at, WebhookCall.id, cursor, per_page
+            )
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
         
-        return jsonify({
-            'calls': [call.to_dict() for call in calls.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': calls.total,
-                'pages': calls.pages
-            }
-        })
+        return stream_page('calls', calls, pagination)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -444,7 +487,7 @@ def get_webhook_calls(webhook_id):
 def get_webhook_call(call_id):
     """Get specific webhook call details"""
     try:
-        call = WebhookCall.query.filter_by(call_id=call_id).first()
+        call = _get_webhook_call(call_id)
         
         if not call:
             return jsonify({'error': 'Webhook call not found'}), 404
@@ -458,7 +501,7 @@ def get_webhook_call(call_id):
 def test_webhook(webhook_id):
     """Test a webhook with sample data"""
     try:
-        webhook = Webhook.query.filter_by(webhook_id=webhook_id).first()
+        webhook = _get_webhook(webhook_id)
         
         if not webhook:
             return jsonify({'error': 'Webhook not found'}), 404
@@ -2,21 +2,271 @@
 Workflows routes for n8n Integration Service
 """
 
-import uuid
-import json
+import os
 import requests
-from datetime import datetime
-from flask import Blueprint, request, jsonify
-from src.models.orchestrator import db, Workflow, WorkflowExecution
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, Response, current_app, request, jsonify, url_for
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+try:
+    import redis
+except ImportError:
+    redis = None
+from src.models.orchestrator import db, Workflow, WorkflowExecution, utc_now, seconds_since
+from src.services.workflow_definitions import invalidate_workflow_definitions
+from src.utils import fast_json
+from src.utils.ids import new_id
+from src.utils.pagination import keyset_page, stream_page
+from src.utils.validation import compile_validator, REQUIRED
 
 workflows_bp = Blueprint('workflows', __name__)
 
+_validate_create_workflow = compile_validator([
+    ('name', str, REQUIRED),
+    ('description', None, ''),
+    ('n8n_workflow_id', None, None),
+    ('workflow_definition', dict, {}),
+    ('status', str, 'active')
+])
+
+# Lookup statements built once; per call only the bound id changes
+_WORKFLOW_BY_ID = db.select(Workflow).where(Workflow.workflow_id == db.bindparam('workflow_id'))
+_EXECUTION_BY_ID = db.select(WorkflowExecution).where(WorkflowExecution.execution_id == db.bindparam('execution_id'))
+_EXECUTION_STATUS_BY_ID = db.select(WorkflowExecution.status).where(WorkflowExecution.execution_id == db.bindparam('execution_id'))
+
+def _get_workflow(workflow_id):
+    """Fetch a workflow by its public id"""
+    return db.session.execute(_WORKFLOW_BY_ID, {'workflow_id': workflow_id}).scalar_one_or_none()
+
+def _get_execution(execution_id):
+    """Fetch an execution by its public id"""
+    return db.session.execute(_EXECUTION_BY_ID, {'execution_id': execution_id}).scalar_one_or_none()
+
+# Workflow executions run here instead of on the request thread
+_EXECUTION_POOL = ThreadPoolExecutor(max_workers=32, thread_name_prefix='workflow-execution')
+
+# n8n instance that runs workflows linked through n8n_workflow_id; opt-in,
+# unset keeps executions simulated
+_N8N_BASE_URL = os.getenv('N8N_BASE_URL')
+
+# n8n serves webhooks under the Webhook node's path, not the workflow id
+_N8N_WEBHOOK_NODE_TYPE = 'n8n-nodes-base.webhook'
+
+# Keep-alive session sized to the execution pool; retries cover connect errors only
+_n8n_session = requests.Session()
+_n8n_session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=Retry(connect=3, read=0, backoff_factor=0.1)))
+_n8n_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=Retry(connect=3, read=0, backoff_factor=0.1)))
+
+# Short-lived cache for dashboard polling of /statistics
+_STATISTICS_CACHE_KEY = 'orchestrator:workflow_statistics:v1'
+_STATISTICS_CACHE_TTL = int(os.getenv('STATISTICS_CACHE_TTL', '15'))
+_redis_client = redis.Redis.from_url(os.environ['REDIS_URL']) if redis and os.getenv('REDIS_URL') else None
+
+# Predefined workflow templates; static, so the response body is encoded once
+_WORKFLOW_TEMPLATES = [
+    {
+        'id': 'web_scraping_pipeline',
+        'name': 'Web Scraping Pipeline',
+        'description': 'Complete pipeline for web scraping, processing, and storage',
+        'category': 'data_collection',
+        'agents_used': ['agent1_scraper', 'agent2_knowledge', 'agent3_database'],
+        'workflow_definition': {
+            'nodes': [
+                {
+                    'id': 'trigger',
+                    'type': 'webhook',
+                    'name': 'Webhook Trigger',
+                    'parameters': {
+                        'path': '/scrape',
+                        'method': 'POST'
+                    }
+                },
+                {
+                    'id': 'scraper',
+                    'type': 'agent_call',
+                    'name': 'Web Scraper',
+                    'parameters': {
+                        'agent_id': 'agent1_scraper',
+                        'endpoint': '/api/scraper/scrape',
+                        'method': 'POST'
+                    }
+                },
+                {
+                    'id': 'knowledge',
+                    'type': 'agent_call',
+                    'name': 'Create Knowledge Base',
+                    'parameters': {
+                        'agent_id': 'agent2_knowledge',
+                        'endpoint': '/api/knowledge/create',
+                        'method': 'POST'
+                    }
+                },
+                {
+                    'id': 'storage',
+                    'type': 'agent_call',
+                    'name': 'Store Data',
+                    'parameters': {
+                        'agent_id': 'agent3_database',
+                        'endpoint': '/api/database/store',
+                        'method': 'POST'
+                    }
+                }
+            ],
+            'connections': [
+                {'from': 'trigger', 'to': 'scraper'},
+                {'from': 'scraper', 'to': 'knowledge'},
+                {'from': 'knowledge', 'to': 'storage'}
+            ]
+        }
+    },
+    {
+        'id': 'data_transformation_pipeline',
+        'name': 'Data Transformation Pipeline',
+        'description': 'Transform data between different formats (e.g., BestBuy to Walmart)',
+        'category': 'data_transformation',
+        'agents_used': ['agent4_transformer', 'agent3_database'],
+        'workflow_definition': {
+            'nodes': [
+                {
+                    'id': 'trigger',
+                    'type': 'webhook',
+                    'name': 'Data Input',
+                    'parameters': {
+                        'path': '/transform',
+                        'method': 'POST'
+                    }
+                },
+                {
+                    'id': 'transformer',
+                    'type': 'agent_call',
+                    'name': 'Transform Data',
+                    'parameters': {
+                        'agent_id': 'agent4_transformer',
+                        'endpoint': '/api/transformer/transform',
+                        'method': 'POST'
+                    }
+                },
+                {
+                    'id': 'storage',
+                    'type': 'agent_call',
+                    'name': 'Store Results',
+                    'parameters': {
+                        'agent_id': 'agent3_database',
+                        'endpoint': '/api/database/store',
+                        'method': 'POST'
+                    }
+                }
+            ],
+            'connections': [
+                {'from': 'trigger', 'to': 'transformer'},
+                {'from': 'transformer', 'to': 'storage'}
+            ]
+        }
+    },
+    {
+        'id': 'full_data_pipeline',
+        'name': 'Complete Data Processing Pipeline',
+        'description': 'End-to-end pipeline: scrape, process, transform, and store',
+        'category': 'complete_pipeline',
+        'agents_used': ['agent1_scraper', 'agent2_knowledge', 'agent4_transformer', 'agent3_database'],
+        'workflow_definition': {
+            'nodes': [
+                {
+                    'id': 'trigger',
+                    'type': 'webhook',
+                    'name': 'Pipeline Trigger',
+                    'parameters': {
+                        'path': '/pipeline',
+                        'method': 'POST'
+                    }
+                },
+                {
+                    'id': 'scraper',
+                    'type': 'agent_call',
+                    'name': 'Collect Data',
+                    'parameters': {
+                        'agent_id': 'agent1_scraper',
+                        'endpoint': '/api/scraper/scrape',
+                        'method': 'POST'
+                    }
+                },
+                {
+                    'id': 'knowledge',
+                    'type': 'agent_call',
+                    'name': 'Process Knowledge',
+                    'parameters': {
+                        'agent_id': 'agent2_knowledge',
+                        'endpoint': '/api/knowledge/create',
+                        'method': 'POST'
+                    }
+                },
+                {
+                    'id': 'transformer',
+                    'type': 'agent_call',
+                    'name': 'Transform Data',
+                    'parameters': {
+                        'agent_id': 'agent4_transformer',
+                        'endpoint': '/api/transformer/transform',
+                        'method': 'POST'
+                    }
+                },
+                {
+                    'id': 'storage',
+                    'type': 'agent_call',
+                    'name': 'Final Storage',
+                    'parameters': {
+                        'agent_id': 'agent3_database',
+                        'endpoint': '/api/database/store',
+                        'method': 'POST'
+                    }
+                }
+            ],
+            'connections': [
+                {'from': 'trigger', 'to': 'scraper'},
+                {'from': 'scraper', 'to': 'knowledge'},
+                {'from': 'knowledge', 'to': 'transformer'},
+                {'from': 'transformer', 'to': 'storage'}
+            ]
+        }
+    }
+]
+
+_TEMPLATES_JSON = fast_json.dumps({'templates': _WORKFLOW_TEMPLATES}).encode('utf-8')
+
+# Templates available to create_workflow_from_template (this would normally be
+# from a database)
+_TEMPLATE_INDEX = {
+    'web_scraping_pipeline': {
+        'name': 'Web Scraping Pipeline',
+        'description': 'Complete pipeline for web scraping, processing, and storage',
+        'workflow_definition': {
+            'nodes': [
+                {'id': 'trigger', 'type': 'webhook', 'name': 'Webhook Trigger'},
+                {'id': 'scraper', 'type': 'agent_call', 'name': 'Web Scraper'},
+                {'id': 'knowledge', 'type': 'agent_call', 'name': 'Create Knowledge Base'},
+                {'id': 'storage', 'type': 'agent_call', 'name': 'Store Data'}
+            ]
+        }
+    },
+    'data_transformation_pipeline': {
+        'name': 'Data Transformation Pipeline',
+        'description': 'Transform data between different formats',
+        'workflow_definition': {
+            'nodes': [
+                {'id': 'trigger', 'type': 'webhook', 'name': 'Data Input'},
+                {'id': 'transformer', 'type': 'agent_call', 'name': 'Transform Data'},
+                {'id': 'storage', 'type': 'agent_call', 'name': 'Store Results'}
+            ]
+        }
+    }
+}
+
 @workflows_bp.route('/', methods=['GET'])
 def list_workflows():
     """List all workflows"""
     try:
-        page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        cursor = request.args.get('cursor')
         status_filter = request.args.get('status')
         
         query = Workflow.query
@@ -24,19 +274,14 @@ def list_workflows():
         if status_filter:
             query = query.filter_by(status=status_filter)
         
-        workflows = query.order_by(Workflow.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        try:
+            workflows, pagination = keyset_page(
+                query, Workflow.created_at, Workflow.id, cursor, per_page
+            )
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
         
-        return jsonify({
-            'workflows': [workflow.to_dict() for workflow in workflows.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': workflows.total,
-                'pages': workflows.pages
-            }
-        })
+        return stream_page('workflows', workflows, pagination)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -50,20 +295,18 @@ def create_workflow():
         if not data:
             return jsonify({'error': 'Request data is required'}), 400
         
-        # Validate required fields
-        required_fields = ['name']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Field {field} is required'}), 400
+        fields, error = _validate_create_workflow(data)
+        if error:
+            return jsonify({'error': error}), 400
         
         # Create workflow
         workflow = Workflow(
-            workflow_id=str(uuid.uuid4()),
-            name=data['name'],
-            description=data.get('description', ''),
-            n8n_workflow_id=data.get('n8n_workflow_id'),
-            workflow_definition=json.dumps(data.get('workflow_definition', {})),
-            status=data.get('status', 'active')
+            workflow_id=new_id(),
+            name=fields['name'],
+            description=fields['description'],
+            n8n_workflow_id=fields['n8n_workflow_id'],
+            workflow_definition=fields['workflow_definition'],
+            status=fields['status']
         )
         
         db.session.add(workflow)
@@ -81,7 +324,7 @@ def create_workflow():
 def get_workflow(workflow_id):
     """Get a specific workflow"""
     try:
-        workflow = Workflow.query.filter_by(workflow_id=workflow_id).first()
+        workflow = _get_workflow(workflow_id)
         
         if not workflow:
             return jsonify({'error': 'Workflow not found'}), 404
@@ -95,7 +338,7 @@ def get_workflow(workflow_id):
 def update_workflow(workflow_id):
     """Update a workflow"""
     try:
-        workflow = Workflow.query.filter_by(workflow_id=workflow_id).first()
+        workflow = _get_workflow(workflow_id)
         
         if not workflow:
             return jsonify({'error': 'Workflow not found'}), 404
@@ -112,10 +355,11 @@ def update_workflow(workflow_id):
                 setattr(workflow, field, data[field])
         
         if 'workflow_definition' in data:
-            workflow.workflow_definition = json.dumps(data['workflow_definition'])
+            workflow.workflow_definition = data['workflow_definition']
         
-        workflow.updated_at = datetime.utcnow()
+        workflow.updated_at = utc_now()
         db.session.commit()
+        invalidate_workflow_definitions()
         
         return jsonify({
             'message': 'Workflow updated successfully',
@@ -129,13 +373,16 @@ def update_workflow(workflow_id):
 def delete_workflow(workflow_id):
     """Delete a workflow"""
     try:
-        workflow = Workflow.query.filter_by(workflow_id=workflow_id).first()
+        # Bulk DELETEs: the ORM cascade would load every execution first
+        WorkflowExecution.query.filter_by(workflow_id=workflow_id).delete(synchronize_session=False)
+        deleted = Workflow.query.filter_by(workflow_id=workflow_id).delete(synchronize_session=False)
         
-        if not workflow:
+        if not deleted:
+            db.session.rollback()
             return jsonify({'error': 'Workflow not found'}), 404
         
-        db.session.delete(workflow)
         db.session.commit()
+        invalidate_workflow_definitions()
         
         return jsonify({'message': 'Workflow deleted successfully'})
         
@@ -146,7 +393,7 @@ def delete_workflow(workflow_id):
 def execute_workflow(workflow_id):
     """Execute a workflow"""
     try:
-        workflow = Workflow.query.filter_by(workflow_id=workflow_id).first()
+        workflow = _get_workflow(workflow_id)
         
         if not workflow:
             return jsonify({'error': 'Workflow not found'}), 404
@@ -154,63 +401,134 @@ def execute_workflow(workflow_id):
         if workflow.status != 'active':
             return jsonify({'error': 'Workflow is not active'}), 400
         
+        try:
+            n8n_webhook_path = _n8n_webhook_path(workflow)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         data = request.get_json()
         trigger_data = data.get('trigger_data', {}) if data else {}
         
-        # Create execution record
+        # Insert the execution before answering, so the status URL resolves
+        # immediately; the pool only ever runs committed executions
         execution = WorkflowExecution(
-            execution_id=str(uuid.uuid4()),
+            execution_id=new_id(),
             workflow_id=workflow_id,
             trigger_type='manual',
-            trigger_data=json.dumps(trigger_data),
+            trigger_data=trigger_data,
             status='running'
         )
         
         db.session.add(execution)
         db.session.commit()
         
-        # Execute workflow logic here
-        # This is a placeholder - in a real implementation, this would trigger n8n
-        try:
-            # Simulate workflow execution
-            execution_result = {
-                'status': 'success',
-                'message': 'Workflow executed successfully',
-                'data': trigger_data
-            }
-            
-            execution.status = 'success'
-            execution.execution_data = json.dumps(execution_result)
-            execution.completed_at = datetime.utcnow()
-            execution.execution_time_seconds = (execution.completed_at - execution.started_at).total_seconds()
-            
-        except Exception as e:
-            execution.status = 'error'
-            execution.error_message = str(e)
-            execution.completed_at = datetime.utcnow()
-            execution.execution_time_seconds = (execution.completed_at - execution.started_at).total_seconds()
+        # Serialize the committed row, primary key included, before the
+        # worker can start changing it
+        execution_data = execution.to_dict()
+        status_url = url_for('workflows.get_execution', execution_id=execution.execution_id)
         
-        db.session.commit()
+        _EXECUTION_POOL.submit(
+            _run_execution, current_app._get_current_object(),
+            execution.execution_id, n8n_webhook_path, trigger_data
+        )
         
         return jsonify({
             'message': 'Workflow execution started',
-            'execution': execution.to_dict()
-        })
+            'execution': execution_data,
+            'status_url': status_url
+        }), 202, {'Location': status_url}
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _n8n_webhook_path(workflow):
+    """Webhook path of a linked n8n workflow, or None to simulate the execution.
+
+    Raises when the workflow is linked to n8n but its definition has no
+    Webhook node path to trigger it through.
+    """
+    if not _N8N_BASE_URL or not workflow.n8n_workflow_id:
+        return None
+    
+    for node in (workflow.workflow_definition or {}).get('nodes', []):
+        if node.get('type') == _N8N_WEBHOOK_NODE_TYPE:
+            path = node.get('parameters', {}).get('path') or node.get('webhookId')
+            if path:
+                return path.strip('/')
+    
+    raise ValueError(f'n8n workflow {workflow.n8n_workflow_id} has no {_N8N_WEBHOOK_NODE_TYPE} node with a path')
+
+def _run_execution(app, execution_id, n8n_webhook_path, trigger_data):
+    """Run a workflow execution outside the request thread"""
+    with app.app_context():
+        try:
+            status = db.session.execute(_EXECUTION_STATUS_BY_ID, {'execution_id': execution_id}).scalar_one_or_none()
+            if status != 'running':
+                return
+            
+            try:
+                if n8n_webhook_path:
+                    execution_result = _trigger_n8n_workflow(n8n_webhook_path, trigger_data)
+                else:
+                    # No linked n8n workflow, simulate workflow execution
+                    execution_result = {
+                        'status': 'success',
+                        'message': 'Workflow executed successfully',
+                        'data': trigger_data
+                    }
+                
+                values = {
+                    'status': 'success',
+                    'n8n_execution_id': execution_result.get('execution_id'),
+                    'execution_data': execution_result
+                }
+                
+            except Exception as e:
+                values = {'status': 'error', 'error_message': str(e)}
+            
+            # Compare-and-set: a cancel that landed while the workflow ran wins
+            db.session.execute(
+                db.update(WorkflowExecution)
+                .where(WorkflowExecution.execution_id == execution_id, WorkflowExecution.status == 'running')
+                .values(
+                    completed_at=utc_now(),
+                    execution_time_seconds=seconds_since(WorkflowExecution.started_at),
+                    **values
+                )
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception(f'Workflow execution {execution_id} failed')
+
+def _trigger_n8n_workflow(webhook_path, trigger_data):
+    """Trigger a workflow on the n8n instance through its Webhook node"""
+    url = f"{_N8N_BASE_URL.rstrip('/')}/webhook/{webhook_path}"
+    response = _n8n_session.post(url, json=trigger_data, timeout=30)
+    
+    if response.status_code != 200:
+        raise Exception(f'n8n trigger failed with status {response.status_code}: {response.text}')
+    
+    try:
+        response_data = response.json()
+    except ValueError:
+        response_data = {'response': response.text}
+    
+    return {
+        'status': 'success',
+        'message': 'Workflow executed successfully',
+        'execution_id': response_data.get('executionId') if isinstance(response_data, dict) else None,
+        'data': response_data
+    }
+
 @workflows_bp.route('/<workflow_id>/executions', methods=['GET'])
 def get_workflow_executions(workflow_id):
     """Get workflow executions"""
     try:
-        workflow = Workflow.query.filter_by(workflow_id=workflow_id).first()
-        
-        if not workflow:
-            return jsonify({'error': 'Workflow not found'}), 404
-        
-        page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        cursor = request.args.get('cursor')
         status_filter = request.args.get('status')
         
         query = WorkflowExecution.query.filter_by(workflow_id=workflow_id)
@@ -218,19 +536,20 @@ def get_workflow_executions(workflow_id):
         if status_filter:
             query = query.filter_by(status=status_filter)
         
-        executions = query.order_by(WorkflowExecution.started_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        try:
+            executions, pagination = keyset_page(
+                query, WorkflowExecution.started_at, WorkflowExecution.id, cursor, per_page
+            )
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        
+        # Executions imply the workflow exists (FK); only probe on an empty page
+        if not executions and not db.session.query(
+            Workflow.query.filter_by(workflow_id=workflow_id).exists()
+        ).scalar():
+            return jsonify({'error': 'Workflow not found'}), 404
         
-        return jsonify({
-            'executions': [execution.to_dict() for execution in executions.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': executions.total,
-                'pages': executions.pages
-            }
-        })
+        return stream_page('executions', executions, pagination)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -239,7 +558,7 @@ def get_workflow_executions(workflow_id):
 def get_execution(execution_id):
     """Get a specific execution"""
     try:
-        execution = WorkflowExecution.query.filter_by(execution_id=execution_id).first()
+        execution = _get_execution(execution_id)
         
         if not execution:
             return jsonify({'error': 'Execution not found'}), 404
@@ -253,7 +572,7 @@ def get_execution(execution_id):
 def cancel_execution(execution_id):
     """Cancel a running execution"""
     try:
-        execution = WorkflowExecution.query.filter_by(execution_id=execution_id).first()
+        execution = _get_execution(execution_id)
         
         if not execution:
             return jsonify({'error': 'Execution not found'}), 404
@@ -262,9 +581,9 @@ def cancel_execution(execution_id):
             return jsonify({'error': 'Execution is not running'}), 400
         
         execution.status = 'cancelled'
-        execution.completed_at = datetime.utcnow()
+        execution.completed_at = utc_now()
         execution.error_message = 'Cancelled by user'
-        execution.execution_time_seconds = (execution.completed_at - execution.started_at).total_seconds()
+        execution.execution_time_seconds = seconds_since(WorkflowExecution.started_at)
         
         db.session.commit()
         
@@ -279,179 +598,7 @@ def cancel_execution(execution_id):
 @workflows_bp.route('/templates', methods=['GET'])
 def get_workflow_templates():
     """Get predefined workflow templates"""
-    try:
-        templates = [
-            {
-                'id': 'web_scraping_pipeline',
-                'name': 'Web Scraping Pipeline',
-                'description': 'Complete pipeline for web scraping, processing, and storage',
-                'category': 'data_collection',
-                'agents_used': ['agent1_scraper', 'agent2_knowledge', 'agent3_database'],
-                'workflow_definition': {
-                    'nodes': [
-                        {
-                            'id': 'trigger',
-                            'type': 'webhook',
-                            'name': 'Webhook Trigger',
-                            'parameters': {
-                                'path': '/scrape',
-                                'method': 'POST'
-                            }
-                        },
-                        {
-                            'id': 'scraper',
-                            'type': 'agent_call',
-                            'name': 'Web Scraper',
-                            'parameters': {
-                                'agent_id': 'agent1_scraper',
-                                'endpoint': '/api/scraper/scrape',
-                                'method': 'POST'
-                            }
-                        },
-                        {
-                            'id': 'knowledge',
-                            'type': 'agent_call',
-                            'name': 'Create Knowledge Base',
-                            'parameters': {
-                                'agent_id': 'agent2_knowledge',
-                                'endpoint': '/api/knowledge/create',
-                                'method': 'POST'
-                            }
-                        },
-                        {
-                            'id': 'storage',
-                            'type': 'agent_call',
-                            'name': 'Store Data',
-                            'parameters': {
-                                'agent_id': 'agent3_database',
-                                'endpoint': '/api/database/store',
-                                'method': 'POST'
-                            }
-                        }
-                    ],
-                    'connections': [
-                        {'from': 'trigger', 'to': 'scraper'},
-                        {'from': 'scraper', 'to': 'knowledge'},
-                        {'from': 'knowledge', 'to': 'storage'}
-                    ]
-                }
-            },
-            {
-                'id': 'data_transformation_pipeline',
-                'name': 'Data Transformation Pipeline',
-                'description': 'Transform data between different formats (e.g., BestBuy to Walmart)',
-                'category': 'data_transformation',
-                'agents_used': ['agent4_transformer', 'agent3_database'],
-                'workflow_definition': {
-                    'nodes': [
-                        {
-                            'id': 'trigger',
-                            'type': 'webhook',
-                            'name': 'Data Input',
-                            'parameters': {
-                                'path': '/transform',
-                                'method': 'POST'
-                            }
-                        },
-                        {
-                            'id': 'transformer',
-                            'type': 'agent_call',
-                            'name': 'Transform Data',
-                            'parameters': {
-                                'agent_id': 'agent4_transformer',
-                                'endpoint': '/api/transformer/transform',
-                                'method': 'POST'
-                            }
-                        },
-                        {
-                            'id': 'storage',
-                            'type': 'agent_call',
-                            'name': 'Store Results',
-                            'parameters': {
-                                'agent_id': 'agent3_database',
-                                'endpoint': '/api/database/store',
-                                'method': 'POST'
-                            }
-                        }
-                    ],
-                    'connections': [
-                        {'from': 'trigger', 'to': 'transformer'},
-                        {'from': 'transformer', 'to': 'storage'}
-                    ]
-                }
-            },
-            {
-                'id': 'full_data_pipeline',
-                'name': 'Complete Data Processing Pipeline',
-                'description': 'End-to-end pipeline: scrape, process, transform, and store',
-                'category': 'complete_pipeline',
-                'agents_used': ['agent1_scraper', 'agent2_knowledge', 'agent4_transformer', 'agent3_database'],
-                'workflow_definition': {
-                    'nodes': [
-                        {
-                            'id': 'trigger',
-                            'type': 'webhook',
-                            'name': 'Pipeline Trigger',
-                            'parameters': {
-                                'path': '/pipeline',
-                                'method': 'POST'
-                            }
-                        },
-                        {
-                            'id': 'scraper',
-                            'type': 'agent_call',
-                            'name': 'Collect Data',
-                            'parameters': {
-                                'agent_id': 'agent1_scraper',
-                                'endpoint': '/api/scraper/scrape',
-                                'method': 'POST'
-                            }
-                        },
-                        {
-                            'id': 'knowledge',
-                            'type': 'agent_call',
-                            'name': 'Process Knowledge',
-                            'parameters': {
-                                'agent_id': 'agent2_knowledge',
-                                'endpoint': '/api/knowledge/create',
-                                'method': 'POST'
-                            }
-                        },
-                        {
-                            'id': 'transformer',
-                            'type': 'agent_call',
-                            'name': 'Transform Data',
-                            'parameters': {
-                                'agent_id': 'agent4_transformer',
-                                'endpoint': '/api/transformer/transform',
-                                'method': 'POST'
-                            }
-                        },
-                        {
-                            'id': 'storage',
-                            'type': 'agent_call',
-                            'name': 'Final Storage',
-                            'parameters': {
-                                'agent_id': 'agent3_database',
-                                'endpoint': '/api/database/store',
-                                'method': 'POST'
-                            }
-                        }
-                    ],
-                    'connections': [
-                        {'from': 'trigger', 'to': 'scraper'},
-                        {'from': 'scraper', 'to': 'knowledge'},
-                        {'from': 'knowledge', 'to': 'transformer'},
-                        {'from': 'transformer', 'to': 'storage'}
-                    ]
-                }
-            }
-        ]
-        
-        return jsonify({'templates': templates})
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    return Response(_TEMPLATES_JSON, mimetype='application/json')
 
 @workflows_bp.route('/templates/<template_id>/create', methods=['POST'])
 def create_workflow_from_template(template_id):
@@ -459,34 +606,7 @@ def create_workflow_from_template(template_id):
     try:
         data = request.get_json()
         
-        # Get template (this would normally be from a database)
-        templates = {
-            'web_scraping_pipeline': {
-                'name': 'Web Scraping Pipeline',
-                'description': 'Complete pipeline for web scraping, processing, and storage',
-                'workflow_definition': {
-                    'nodes': [
-                        {'id': 'trigger', 'type': 'webhook', 'name': 'Webhook Trigger'},
-                        {'id': 'scraper', 'type': 'agent_call', 'name': 'Web Scraper'},
-                        {'id': 'knowledge', 'type': 'agent_call', 'name': 'Create Knowledge Base'},
-                        {'id': 'storage', 'type': 'agent_call', 'name': 'Store Data'}
-                    ]
-                }
-            },
-            'data_transformation_pipeline': {
-                'name': 'Data Transformation Pipeline',
-                'description': 'Transform data between different formats',
-                'workflow_definition': {
-                    'nodes': [
-                        {'id': 'trigger', 'type': 'webhook', 'name': 'Data Input'},
-                        {'id': 'transformer', 'type': 'agent_call', 'name': 'Transform Data'},
-                        {'id': 'storage', 'type': 'agent_call', 'name': 'Store Results'}
-                    ]
-                }
-            }
-        }
-        
-        template = templates.get(template_id)
+        template = _TEMPLATE_INDEX.get(template_id)
         if not template:
             return jsonify({'error': 'Template not found'}), 404
         
@@ -495,10 +615,10 @@ def create_workflow_from_template(template_id):
         workflow_description = data.get('description', template['description'])
         
         workflow = Workflow(
-            workflow_id=str(uuid.uuid4()),
+            workflow_id=new_id(),
             name=workflow_name,
             description=workflow_description,
-            workflow_definition=json.dumps(template['workflow_definition']),
+            workflow_definition=template['workflow_definition'],
             status='active'
         )
         
@@ -517,22 +637,25 @@ def create_workflow_from_template(template_id):
 def get_workflow_statistics():
     """Get workflow statistics"""
     try:
-        total_workflows = Workflow.query.count()
-        active_workflows = Workflow.query.filter_by(status='active').count()
-        
-        total_executions = WorkflowExecution.query.count()
-        successful_executions = WorkflowExecution.query.filter_by(status='success').count()
-        failed_executions = WorkflowExecution.query.filter_by(status='error').count()
-        running_executions = WorkflowExecution.query.filter_by(status='running').count()
-        
-        # Calculate average execution time
-        completed_executions = WorkflowExecution.query.filter(
-            WorkflowExecution.execution_time_seconds.isnot(None)
-        ).all()
-        
-        avg_execution_time = 0
-        if completed_executions:
-            avg_execution_time = sum([e.execution_time_seconds for e in completed_executions]) / len(completed_executions)
+        cached = _get_cached_statistics()
+        if cached:
+            return Response(cached, mimetype='application/json')
+        
+        # One aggregate row per table; COUNT ... FILTER keeps it a single scan
+        total_workflows, active_workflows = db.session.query(
+            db.func.count(Workflow.id),
+            db.func.count(Workflow.id).filter(Workflow.status == 'active')
+        ).one()
+        
+        (total_executions, successful_executions, failed_executions,
+         running_executions, avg_execution_time) = db.session.query(
+            db.func.count(WorkflowExecution.id),
+            db.func.count(WorkflowExecution.id).filter(WorkflowExecution.status == 'success'),
+            db.func.count(WorkflowExecution.id).filter(WorkflowExecution.status == 'error'),
+            db.func.count(WorkflowExecution.id).filter(WorkflowExecution.status == 'running'),
+            db.func.avg(WorkflowExecution.execution_time_seconds)
+        ).one()
+        avg_execution_time = avg_execution_time or 0
         
         statistics = {
             'workflows': {
@@ -552,8 +675,29 @@ def get_workflow_statistics():
             }
         }
         
-        return jsonify({'statistics': statistics})
+        payload = fast_json.dumps({'statistics': statistics})
+        _set_cached_statistics(payload)
+        
+        return Response(payload, mimetype='application/json')
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _get_cached_statistics():
+    """Return the cached statistics payload, if any"""
+    if _redis_client is None:
+        return None
+    try:
+        return _redis_client.get(_STATISTICS_CACHE_KEY)
+    except redis.RedisError:
+        return None
+
+def _set_cached_statistics(payload):
+    """Cache a statistics payload for _STATISTICS_CACHE_TTL seconds"""
+    if _redis_client is None:
+        return
+    try:
+        _redis_client.set(_STATISTICS_CACHE_KEY, payload, ex=_STATISTICS_CACHE_TTL)
+    except redis.RedisError:
+        pass
+
@@ -0,0 +1,113 @@
+"""
+Batch Writer Service for n8n Orchestrator
+"""
+
+import atexit
+import queue
+import threading
+import time
+from typing import Dict, List, Any
+from sqlalchemy.exc import OperationalError
+from src.models.orchestrator import db, WebhookCall
+
+class BatchWriter:
+    """Buffers rows for one model and writes them in multi-row INSERT batches.
+
+    Recorded rows are not readable from the database until the next flush,
+    at most flush_interval seconds later.
+    """
+
+    def __init__(self, model, max_batch_size: int = 500, flush_interval: float = 0.05,
+                 retry_delay: float = 1.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.retry_delay = retry_delay
+        self.app = None
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._worker_thread = None
+
+    def init_app(self, app):
+        """Bind the writer to an app and start the background flusher"""
+        self.app = app
+        self._worker_thread = threading.Thread(target=self._run, daemon=True)
+        self._worker_thread.start()
+        atexit.register(self.flush)
+
+    def record(self, row: Dict[str, Any]):
+        """Queue a row for the next batch; it is readable once that batch is flushed"""
+        self._queue.put(row)
+
+    def flush(self):
+        """Write every queued row now"""
+        while True:
+            batch = self._drain(block=False)
+            if not batch:
+                return
+            self._write_batch(batch, requeue=False)
+
+    def _run(self):
+        """Flush a batch every flush_interval or max_batch_size rows"""
+        while True:
+            batch = self._drain(block=True)
+            if batch and not self._write_batch(batch):
+                # Database unavailable; the rows were requeued
+                time.sleep(self.retry_delay)
+
+    def _drain(self, block: bool) -> List[Dict[str, Any]]:
+        """Collect up to max_batch_size queued rows"""
+        batch = []
+        try:
+            if block:
+                batch.append(self._queue.get())
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    batch.append(self._queue.get(timeout=remaining))
+            else:
+                while len(batch) < self.max_batch_size:
+                    batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write_batch(self, batch: List[Dict[str, Any]], requeue: bool = True) -> bool:
+        """Insert a batch with a single executemany INSERT, falling back to one row at a time.
+
+        Returns False when the database was unavailable and the unwritten
+        rows were put back on the queue.
+        """
+        table_name = self.model.__tablename__
+        with self._lock, self.app.app_context():
+            try:
+                db.session.execute(self.model.__table__.insert(), batch)
+                db.session.commit()
+                return True
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.warning(f'Failed to write {len(batch)} {table_name} rows, retrying one at a time: {str(e)}')
+            
+            # A bad row only drops itself
+            for index, row in enumerate(batch):
+                try:
+                    db.session.execute(self.model.__table__.insert(), row)
+                    db.session.commit()
+                except OperationalError as e:
+                    db.session.rollback()
+                    if not requeue:
+                        self.app.logger.error(f'Dropped {len(batch) - index} {table_name} rows, database unavailable: {str(e)}')
+                        return True
+                    for pending in batch[index:]:
+                        self._queue.put(pending)
+                    self.app.logger.error(f'Requeued {len(batch) - index} {table_name} rows, database unavailable: {str(e)}')
+                    return False
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.error(f'Dropped {table_name} row: {str(e)}')
+        
+        return True
+
+webhook_call_writer = BatchWriter(WebhookCall)
@@ -0,0 +1,28 @@
+"""
+Workflow definition cache for n8n Orchestrator
+"""
+
+import copy
+from functools import lru_cache
+from typing import Dict, Any
+from src.models.orchestrator import db, Workflow
+
+@lru_cache(maxsize=1024)
+def _load_workflow_definition(workflow_id, updated_at):
+    """Load a workflow definition, cached per workflow revision"""
+    definition = db.session.query(Workflow.workflow_definition).filter_by(
+        workflow_id=workflow_id
+    ).scalar()
+    return definition or {}
+
+def get_workflow_definition(workflow_id, updated_at) -> Dict[str, Any]:
+    """Get a private copy of a workflow definition.
+
+    ``updated_at`` only has millisecond resolution on SQLite, so writers must
+    also call invalidate_workflow_definitions() after changing a workflow.
+    """
+    return copy.deepcopy(_load_workflow_definition(workflow_id, updated_at))
+
+def invalidate_workflow_definitions():
+    """Drop cached definitions after a workflow is updated or deleted"""
+    _load_workflow_definition.cache_clear()
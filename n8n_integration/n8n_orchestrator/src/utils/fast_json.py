@@ -0,0 +1,68 @@
+"""
+Fast JSON serialization for n8n Orchestrator Service
+"""
+
+import json
+from flask.json.provider import DefaultJSONProvider
+
+# orjson is a CPython extension; on PyPy the stdlib json module is used,
+# which the JIT handles well
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Datetimes go through the provider's default() so responses keep Flask's format
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+def dumps(obj):
+    """Serialize obj to a JSON string, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS).decode('utf-8')
+    return json.dumps(obj)
+
+def loads(data):
+    """Deserialize a JSON string or bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# What Flask passes for compact responses, which is also orjson's output
+_COMPACT_SEPARATORS = (',', ':')
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson for jsonify and request.get_json"""
+    
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        
+        # Map the arguments Flask passes (indent, separators, sort_keys, ...)
+        # onto orjson options; anything else needs the stdlib encoder
+        options = dict(kwargs)
+        option = _ORJSON_OPTIONS
+        indent = options.pop('indent', None)
+        if indent:
+            if indent != 2:
+                return super().dumps(obj, **kwargs)
+            option |= orjson.OPT_INDENT_2
+        if options.pop('separators', None) not in (None, _COMPACT_SEPARATORS):
+            return super().dumps(obj, **kwargs)
+        if options.pop('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        # orjson always writes UTF-8; escaped or not, the JSON is equivalent
+        options.pop('ensure_ascii', None)
+        default = options.pop('default', self.default)
+        if options:
+            return super().dumps(obj, **kwargs)
+        
+        try:
+            return orjson.dumps(obj, default=default, option=option).decode('utf-8')
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits, which the stdlib encodes
+            return super().dumps(obj, **kwargs)
+    
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
@@ -0,0 +1,67 @@
+"""
+Keyset pagination helpers for n8n Orchestrator Service
+"""
+
+from datetime import datetime
+from flask import Response, stream_with_context
+from src.models.orchestrator import db
+from src.utils import fast_json
+
+MAX_PER_PAGE = 100
+
+def format_cursor(timestamp, row_id):
+    """Encode a row position as a pagination cursor"""
+    return f"{timestamp.isoformat()},{row_id}"
+
+def parse_cursor(cursor):
+    """Decode a pagination cursor into (timestamp, id); raises ValueError"""
+    timestamp, _, row_id = cursor.rpartition(',')
+    return datetime.fromisoformat(timestamp), int(row_id)
+
+def keyset_page(query, timestamp_column, id_column, cursor, per_page):
+    """Fetch one page newest-first after cursor, without a COUNT(*) query.
+
+    Returns (items, pagination) where pagination carries has_next and
+    next_cursor; raises ValueError for a malformed cursor. per_page is
+    clamped to 1..MAX_PER_PAGE.
+    """
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+    
+    if cursor:
+        cursor_timestamp, cursor_id = parse_cursor(cursor)
+        query = query.filter(db.or_(
+            timestamp_column < cursor_timestamp,
+            db.and_(timestamp_column == cursor_timestamp, id_column < cursor_id)
+        ))
+    
+    items = query.order_by(timestamp_column.desc(), id_column.desc()).limit(per_page + 1).all()
+    
+    has_next = len(items) > per_page
+    items = items[:per_page]
+    
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = format_cursor(getattr(last, timestamp_column.key), getattr(last, id_column.key))
+    
+    return items, {
+        'per_page': per_page,
+        'has_next': has_next,
+        'next_cursor': next_cursor
+    }
+
+def stream_page(key, items, pagination):
+    """Stream a page as {key: [...], 'pagination': {...}}, one row at a time"""
+    # Encode every row before the 200 goes out, so a bad row still surfaces
+    # as the caller's error response instead of a truncated body
+    rows = [fast_json.dumps(item.to_dict()) for item in items]
+    
+    def generate():
+        yield '{' + fast_json.dumps(key) + ':['
+        for index, row in enumerate(rows):
+            if index:
+                yield ','
+            yield row
+        yield '],"pagination":' + fast_json.dumps(pagination) + '}'
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
@@ -0,0 +1,37 @@
+"""
+Request payload validation for n8n Orchestrator Service
+"""
+
+REQUIRED = object()
+
+def compile_validator(fields):
+    """Generate a validator for a JSON request body.
+
+    ``fields`` is a list of ``(name, types, default)``; pass ``REQUIRED`` as the
+    default for mandatory fields and ``None`` as types to skip the type check.
+    The returned function maps ``data`` to ``(values, None)`` or
+    ``(None, error_message)``, filling in defaults for missing fields.
+    """
+    namespace = {}
+    lines = ["def validate(data):"]
+    items = []
+    for index, (name, types, default) in enumerate(fields):
+        var = f"v{index}"
+        if default is REQUIRED:
+            lines.append(f"    if {name!r} not in data:")
+            lines.append(f"        return None, 'Field {name} is required'")
+            lines.append(f"    {var} = data[{name!r}]")
+        else:
+            lines.append(f"    {var} = data.get({name!r}, {default!r})")
+        if types is not None:
+            namespace[f"t{index}"] = types
+            type_names = ' or '.join(t.__name__ for t in (types if isinstance(types, tuple) else (types,)))
+            check = f"not isinstance({var}, t{index})"
+            if default is not REQUIRED and default is None:
+                check = f"{var} is not None and {check}"
+            lines.append(f"    if {check}:")
+            lines.append(f"        return None, 'Field {name} must be {type_names}'")
+        items.append(f"{name!r}: {var}")
+    lines.append("    return {" + ", ".join(items) + "}, None")
+    exec('\n'.join(lines), namespace)
+    return namespace['validate']
@@ -0,0 +1,59 @@
+"""
+Tests for the orjson-backed Flask JSON provider
+"""
+
+import json
+from datetime import datetime
+
+import pytest
+from flask import Flask, jsonify
+
+orjson = pytest.importorskip('orjson')
+
+from src.utils import fast_json
+from src.utils.fast_json import FastJSONProvider
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    return app
+
+@pytest.fixture
+def stdlib_dumps_calls(monkeypatch):
+    """Record every call that reaches the stdlib encoder"""
+    calls = []
+    real_dumps = json.dumps
+    
+    def recording_dumps(*args, **kwargs):
+        calls.append(kwargs)
+        return real_dumps(*args, **kwargs)
+    
+    monkeypatch.setattr(json, 'dumps', recording_dumps)
+    return calls
+
+@pytest.mark.parametrize('debug', [False, True])
+def test_jsonify_uses_orjson(app, stdlib_dumps_calls, debug):
+    app.debug = debug
+    with app.app_context():
+        response = jsonify({'name': 'café', 'count': 3, 1: 'int key'})
+    
+    assert stdlib_dumps_calls == []
+    assert json.loads(response.get_data(as_text=True)) == {'name': 'café', 'count': 3, '1': 'int key'}
+
+def test_jsonify_keeps_flask_datetime_format(app, stdlib_dumps_calls):
+    with app.app_context():
+        response = jsonify({'at': datetime(2024, 1, 2, 3, 4, 5)})
+    
+    assert stdlib_dumps_calls == []
+    assert response.get_json() == {'at': 'Tue, 02 Jan 2024 03:04:05 GMT'}
+
+def test_dumps_falls_back_for_unsupported_arguments(app, stdlib_dumps_calls):
+    assert json.loads(app.json.dumps({'a': 1}, indent=4)) == {'a': 1}
+    assert len(stdlib_dumps_calls) == 1
+
+def test_dumps_falls_back_for_wide_integers(app):
+    assert json.loads(app.json.dumps({'big': 1 << 70})) == {'big': 1 << 70}
+
+def test_module_dumps_round_trips():
+    assert fast_json.loads(fast_json.dumps({'a': [1, 2]})) == {'a': [1, 2]}
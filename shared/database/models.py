@@ -2,28 +2,62 @@
 Database models for the Multi-Agent MCP System
 """
 
+import io
+import os
+import csv
+import time
+import atexit
+import logging
+import threading
+from collections import deque
 from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Boolean, JSON, ForeignKey, Float
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Boolean, JSON, ForeignKey, Float, Index, UniqueConstraint, literal_column, select, update, func, cast, extract, any_, bindparam
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.associationproxy import association_proxy
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.orm import sessionmaker, relationship, selectinload, raiseload, validates
+from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY, INET, insert as pg_insert
 import uuid
 
+try:
+    from pgvector.sqlalchemy import Vector
+except ImportError:
+    Vector = None
+
 Base = declarative_base()
 
+logger = logging.getLogger(__name__)
+
+def _uuid7() -> uuid.UUID:
+    """Time-ordered UUIDv7: a 48-bit millisecond timestamp followed by random bits"""
+    # Monotone keys append to the rightmost B-Tree leaf instead of a random one
+    value = (time.time_ns() // 1000000) << 80 | int.from_bytes(os.urandom(10), 'big')
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
+# text-embedding-ada-002 output size, matching agent2_knowledge.document_chunks
+EMBEDDING_DIMENSIONS = 1536
+
 class Document(Base):
     """
     Stores metadata about documents processed by the system
+    Filter metadata with jsonb_contains() so the GIN index is used
     """
     __tablename__ = 'documents'
+    __table_args__ = (
+        Index('idx_documents_metadata_gin', 'metadata', postgresql_using='gin', postgresql_ops={'metadata': 'jsonb_path_ops'}),
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=_uuid7)
     title = Column(String(500), nullable=False)
     source_url = Column(Text)
     file_path = Column(Text, nullable=False)
     file_type = Column(String(50), nullable=False)
     file_size = Column(Integer)
-    content_hash = Column(String(64))  # SHA-256 hash for deduplication
+    content_hash = Column(String(64), unique=True, index=True)  # SHA-256 hash for deduplication
     metadata = Column(JSONB)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -31,21 +65,44 @@ class Document(Base):
     processing_status = Column(String(20), default='pending')  # pending, processing, completed, failed
     
     # Relationships
-    knowledge_entries = relationship("KnowledgeEntry", back_populates="document")
+    # Loading is explicit: use load_documents_with_entries() rather than N lazy loads
+    knowledge_entries = relationship("KnowledgeEntry", back_populates="document", lazy='raise_on_sql')
     transformations = relationship("Transformation", back_populates="source_document")
+    
+    @classmethod
+    def upsert_by_hash(cls, session, **kwargs):
+        """Insert a document unless its content_hash is already stored; returns the new id or None"""
+        # The unique index does the dedup check atomically in the same roundtrip
+        stmt = (
+            pg_insert(cls)
+            .values(**kwargs)
+            .on_conflict_do_nothing(index_elements=['content_hash'])
+            .returning(cls.id)
+        )
+        return session.execute(stmt).scalar()
 
 class KnowledgeEntry(Base):
     """
     Stores processed knowledge from documents with embeddings
     """
     __tablename__ = 'knowledge_entries'
+    # The HNSW index needs a real vector column, so only with pgvector installed
+    __table_args__ = (
+        Index(
+            'idx_knowledge_embed_hnsw', 'embedding_vector',
+            postgresql_using='hnsw',
+            postgresql_with={'m': 16, 'ef_construction': 64},
+            postgresql_ops={'embedding_vector': 'vector_cosine_ops'}
+        ).ddl_if(dialect='postgresql'),
+    ) if Vector is not None else ()
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=_uuid7)
     document_id = Column(UUID(as_uuid=True), ForeignKey('documents.id'), nullable=False)
     chunk_index = Column(Integer, nullable=False)
     content = Column(Text, nullable=False)
     content_type = Column(String(50))  # paragraph, table, list, code, etc.
-    embedding_vector = Column(Text)  # JSON string of embedding vector
+    # pgvector column when available, JSON string of embedding vector otherwise
+    embedding_vector = Column(Vector(EMBEDDING_DIMENSIONS) if Vector else Text)
     metadata = Column(JSONB)
     created_at = Column(DateTime, default=datetime.utcnow)
     
@@ -55,10 +112,14 @@ class KnowledgeEntry(Base):
 class Template(Base):
     """
     Stores template definitions for data transformation
+    Filter schema_definition with jsonb_contains() so the GIN index is used
     """
     __tablename__ = 'templates'
+    __table_args__ = (
+        Index('idx_templates_schema_gin', 'schema_definition', postgresql_using='gin', postgresql_ops={'schema_definition': 'jsonb_path_ops'}),
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=_uuid7)
     name = Column(String(200), nullable=False)
     platform = Column(String(100), nullable=False)  # bestbuy, walmart, amazon, etc.
     template_type = Column(String(50), nullable=False)  # product_creation, inventory_update, etc.
@@ -79,7 +140,7 @@ class Transformation(Base):
     """
     __tablename__ = 'transformations'
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=_uuid7)
     source_document_id = Column(UUID(as_uuid=True), ForeignKey('documents.id'))
     target_template_id = Column(UUID(as_uuid=True), ForeignKey('templates.id'), nullable=False)
     transformation_rules = Column(JSONB, nullable=False)  # AI-generated mapping rules
@@ -101,7 +162,7 @@ class Task(Base):
     """
     __tablename__ = 'tasks'
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=_uuid7)
     task_type = Column(String(50), nullable=False)  # scrape, process, transform, etc.
     status = Column(String(20), default='pending')  # pending, running, completed, failed
     priority = Column(Integer, default=5)  # 1-10, higher is more urgent
@@ -119,22 +180,59 @@ class Task(Base):
     # Relationships
     subtasks = relationship("Task", backref="parent_task", remote_side=[id])
     parent_task_id = Column(UUID(as_uuid=True), ForeignKey('tasks.id'))
+    
+    __table_args__ = (
+        # Scheduler polls only touch the live subset of tasks
+        Index(
+            'idx_tasks_pending_prio', priority.desc(), created_at,
+            postgresql_where=status.in_(['pending', 'running'])
+        ),
+        Index('idx_tasks_agent_status', assigned_agent, status),
+    )
+    
+    @classmethod
+    def query_by_ids(cls, session, ids):
+        """Fetch tasks for a list of ids"""
+        # id = ANY(:ids) keeps one statement shape whatever the list length,
+        # unlike IN (...) which renders a new statement per length
+        ids_param = bindparam('ids', list(ids), type_=ARRAY(cls.id.type))
+        return session.scalars(select(cls).where(cls.id == any_(ids_param))).all()
 
 class AgentSession(Base):
     """
     Stores agent session information for browser persistence
+    Session data lives in AgentSessionBlob so listing sessions only scans compact rows
     """
     __tablename__ = 'agent_sessions'
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=_uuid7)
     agent_id = Column(String(50), nullable=False)
     session_name = Column(String(100), nullable=False)
-    session_data = Column(JSONB)  # Cookies, local storage, etc.
     browser_profile = Column(String(100))
     is_active = Column(Boolean, default=True)
     last_used = Column(DateTime, default=datetime.utcnow)
     created_at = Column(DateTime, default=datetime.utcnow)
     expires_at = Column(DateTime)
+    
+    # Relationships
+    # selectin: reading session_data across a list of sessions is one extra query, not N
+    blob = relationship("AgentSessionBlob", uselist=False, cascade="all, delete-orphan", lazy='selectin')
+    session_data = association_proxy(
+        "blob", "session_data", creator=lambda session_data: AgentSessionBlob(session_data=session_data)
+    )
+
+class AgentSessionBlob(Base):
+    """
+    Stores the bulky cookie and local storage payload of an agent session
+    Filter session_data with jsonb_contains() so the GIN index is used
+    """
+    __tablename__ = 'agent_session_blobs'
+    __table_args__ = (
+        Index('idx_agent_sessions_data_gin', 'session_data', postgresql_using='gin', postgresql_ops={'session_data': 'jsonb_path_ops'}),
+    )
+    
+    session_id = Column(UUID(as_uuid=True), ForeignKey('agent_sessions.id', ondelete='CASCADE'), primary_key=True)
+    session_data = Column(JSONB)  # Cookies, local storage, etc.
 
 class SystemConfig(Base):
     """
@@ -142,7 +240,7 @@ class SystemConfig(Base):
     """
     __tablename__ = 'system_config'
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=_uuid7)
     config_key = Column(String(100), nullable=False, unique=True)
     config_value = Column(JSONB, nullable=False)
     description = Column(Text)
@@ -150,23 +248,175 @@ class SystemConfig(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+USER_AGENT_MAX_LENGTH = 512
+
 class AuditLog(Base):
     """
     Stores audit trail for all system operations
+    Filter details with jsonb_contains() so the GIN index is used
     """
     __tablename__ = 'audit_logs'
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=_uuid7)
     agent_id = Column(String(50), nullable=False)
     action = Column(String(100), nullable=False)
     resource_type = Column(String(50))
     resource_id = Column(String(100))
     details = Column(JSONB)
-    ip_address = Column(String(45))
-    user_agent = Column(Text)
+    ip_address = Column(INET)
+    user_agent = Column(String(USER_AGENT_MAX_LENGTH))
     timestamp = Column(DateTime, default=datetime.utcnow)
     success = Column(Boolean, default=True)
     error_message = Column(Text)
+    
+    __table_args__ = (
+        Index('idx_audit_details_gin', 'details', postgresql_using='gin', postgresql_ops={'details': 'jsonb_path_ops'}),
+        # Small partial index for failure triage
+        Index('idx_audit_failures', timestamp.desc(), postgresql_where=success.is_(False)),
+    )
+    
+    @validates('user_agent')
+    def _truncate_user_agent(self, key, user_agent):
+        """Clip user agents to the column size; PostgreSQL rejects longer values"""
+        return user_agent[:USER_AGENT_MAX_LENGTH] if user_agent else user_agent
+
+def jsonb_contains(column, key, value):
+    """Build a `column @> {key: value}` filter that can use a jsonb_path_ops GIN index"""
+    # Unlike column[key].astext == value, containment is index-accelerated
+    return column.contains({key: value})
+
+def nearest(session, query_vector, k=10):
+    """Return the k knowledge entries closest to query_vector by cosine distance"""
+    if Vector is None:
+        raise ImportError("nearest() requires the pgvector package (pip install pgvector)")
+    
+    # ORDER BY embedding_vector <=> :q LIMIT :k is served by the HNSW index
+    stmt = (
+        select(KnowledgeEntry)
+        .order_by(KnowledgeEntry.embedding_vector.cosine_distance(query_vector))
+        .limit(k)
+    )
+    return session.scalars(stmt).all()
+
+def load_documents_with_entries(session, ids):
+    """Load documents with their knowledge entries and transformations in batched SELECTs"""
+    stmt = (
+        select(Document)
+        .where(Document.id.in_(ids))
+        .options(
+            selectinload(Document.knowledge_entries),
+            selectinload(Document.transformations),
+            raiseload('*')
+        )
+    )
+    return session.scalars(stmt).all()
+
+class AuditLogBuffer:
+    """
+    Buffers audit events in memory and writes them in batches
+    """
+    
+    def __init__(self, session_factory, max_batch_size=500, flush_interval=0.25, retry_delay=1.0):
+        self.session_factory = session_factory
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.retry_delay = retry_delay
+        self.events = deque()
+        self.flush_lock = threading.Lock()
+        self.start_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.worker_thread = None
+    
+    def append(self, row):
+        """Queue an audit row for the next flush"""
+        self.events.append(row)
+        if self.worker_thread is None:
+            self._start()
+        if len(self.events) >= self.max_batch_size:
+            self.wakeup.set()
+    
+    def flush(self, requeue=True):
+        """Write every buffered event, one commit per batch.
+
+        Returns False when the database was unavailable and the unwritten
+        events were put back at the front of the buffer.
+        """
+        with self.flush_lock:
+            while self.events:
+                rows = []
+                while self.events and len(rows) < self.max_batch_size:
+                    rows.append(self.events.popleft())
+                
+                session = self.session_factory()
+                try:
+                    bulk_save(session, AuditLog, rows)
+                except Exception as e:
+                    session.rollback()
+                    logger.warning(f"Failed to write {len(rows)} audit events, retrying one at a time: {e}")
+                    if not self._write_rows_individually(session, rows, requeue):
+                        return False
+                finally:
+                    session.close()
+        return True
+    
+    def _write_rows_individually(self, session, rows, requeue):
+        """Insert rows one by one so a failing row only drops itself"""
+        for index, row in enumerate(rows):
+            try:
+                bulk_save(session, AuditLog, [row])
+            except OperationalError as e:
+                session.rollback()
+                if not requeue:
+                    logger.error(f"Dropped {len(rows) - index} audit events, database unavailable: {e}")
+                    return True
+                self.events.extendleft(reversed(rows[index:]))
+                logger.error(f"Requeued {len(rows) - index} audit events, database unavailable: {e}")
+                return False
+            except Exception as e:
+                session.rollback()
+                logger.error(f"Failed to write audit event {row.get('action')} for {row.get('agent_id')}: {e}")
+        return True
+    
+    def flush_on_exit(self):
+        """Write any events still buffered at interpreter exit"""
+        self.flush(requeue=False)
+    
+    def _start(self):
+        """Start the background flusher on first use"""
+        with self.start_lock:
+            if self.worker_thread is None:
+                self.worker_thread = threading.Thread(target=self._run, daemon=True)
+                self.worker_thread.start()
+                atexit.register(self.flush_on_exit)
+    
+    def _run(self):
+        """Flush every flush_interval, or sooner when a full batch is waiting"""
+        while True:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            if not self.flush():
+                # Database unavailable; the events were requeued
+                time.sleep(self.retry_delay)
+
+# Audit buffers keyed by engine so log_audit_event can find one from a session
+_audit_log_buffers = {}
+
+def _copy_values(columns, processors, row):
+    """Order a row's values for COPY, filling in column defaults"""
+    values = []
+    for column, processor in zip(columns, processors):
+        if column.name in row:
+            value = row[column.name]
+        elif column.default is None:
+            value = None
+        elif column.default.is_callable:
+            value = column.default.arg(None)
+        else:
+            value = column.default.arg
+        if processor is not None and value is not None:
+            value = processor(value)
+        values.append(value)
+    return values
 
 # Database connection and session management
 class DatabaseManager:
@@ -179,8 +429,82 @@ class DatabaseManager:
             # Default to SQLite for development, PostgreSQL for production
             database_url = "sqlite:///multi_agent_mcp.db"
         
-        self.engine = create_engine(database_url, echo=False)
+        engine_options = {}
+        url = make_url(database_url)
+        if url.get_backend_name() == 'sqlite':
+            if url.database in (None, '', ':memory:'):
+                # Share one connection, otherwise every thread gets its own empty database
+                engine_options.update(
+                    poolclass=StaticPool,
+                    connect_args={'check_same_thread': False},
+                )
+        else:
+            # Sized for many concurrent agents; stale connections are
+            # detected on checkout and recycled before server timeouts
+            engine_options.update(
+                pool_size=20,
+                max_overflow=40,
+                pool_pre_ping=True,
+                pool_recycle=1800,
+            )
+        
+        if url.get_backend_name() == 'postgresql' and url.get_driver_name() == 'psycopg2':
+            # Fold executemany INSERTs into multi-row VALUES pages and batch the
+            # UPDATE/DELETE executemany calls, instead of one roundtrip per row
+            engine_options.update(
+                executemany_mode='values_plus_batch',
+                insertmanyvalues_page_size=1000,
+                executemany_batch_page_size=500,
+            )
+        elif url.get_backend_name() == 'postgresql' and url.get_driver_name() == 'psycopg':
+            # Server-prepare repeated statement shapes on first use
+            engine_options['connect_args'] = {'prepare_threshold': 0}
+        
+        self.engine = create_engine(database_url, echo=False, **engine_options)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.audit_log_buffer = AuditLogBuffer(self.SessionLocal)
+        _audit_log_buffers[self.engine] = self.audit_log_buffer
+    
+    def bulk_copy(self, model, rows):
+        """Load many rows with COPY instead of per-row INSERT parsing and planning"""
+        rows = list(rows)
+        if not rows:
+            return 0
+        
+        # COPY bypasses SQLAlchemy, so apply Python-side defaults and bind
+        # processors (JSON, vector, ...) here
+        table = model.__table__
+        keys = set().union(*rows)
+        columns = [column for column in table.columns if column.name in keys or column.default is not None]
+        processors = [column.type.bind_processor(self.engine.dialect) for column in columns]
+        preparer = self.engine.dialect.identifier_preparer
+        statement = "COPY {} ({}) FROM STDIN".format(
+            preparer.format_table(table),
+            ', '.join(preparer.quote(column.name) for column in columns)
+        )
+        
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            if self.engine.dialect.driver == 'psycopg':
+                with cursor.copy(statement) as copy:
+                    for row in rows:
+                        copy.write_row(_copy_values(columns, processors, row))
+            else:
+                # psycopg2 only takes a file; NULLs are the unquoted empty CSV fields
+                buffer = io.StringIO()
+                writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+                for row in rows:
+                    writer.writerow(_copy_values(columns, processors, row))
+                buffer.seek(0)
+                cursor.copy_expert(f"{statement} WITH (FORMAT csv)", buffer)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+        return len(rows)
     
     def create_tables(self):
         """Create all database tables"""
@@ -195,49 +519,113 @@ class DatabaseManager:
         session.close()
 
 # Utility functions for common database operations
+def _conflict_columns(model, keys):
+    """Find a unique column set of the model fully covered by the given keys"""
+    table = model.__table__
+    candidates = [[column.name] for column in table.columns if column.unique]
+    candidates += [
+        [column.name for column in constraint.columns]
+        for constraint in table.constraints
+        if isinstance(constraint, UniqueConstraint)
+    ]
+    for columns in candidates:
+        if set(columns) <= set(keys):
+            return columns
+    return None
+
 def get_or_create(session, model, **kwargs):
     """Get an existing record or create a new one"""
+    conflict_columns = _conflict_columns(model, kwargs)
+    if conflict_columns and session.get_bind().dialect.name == 'postgresql':
+        # One atomic upsert instead of SELECT then INSERT; the no-op update
+        # makes RETURNING yield the existing row, and xmax = 0 marks an insert
+        stmt = (
+            pg_insert(model)
+            .values(**kwargs)
+            .on_conflict_do_update(
+                index_elements=conflict_columns,
+                set_={column: kwargs[column] for column in conflict_columns}
+            )
+            .returning(model, literal_column('xmax = 0'))
+        )
+        instance, created = session.execute(stmt).one()
+        return instance, created
+    
     instance = session.query(model).filter_by(**kwargs).first()
     if instance:
         return instance, False
     else:
         instance = model(**kwargs)
         session.add(instance)
-        session.commit()
+        session.flush()
         return instance, True
 
+def bulk_save(session, model, rows):
+    """Insert many rows of a model in a single executemany batch"""
+    # render_nulls keeps rows with None values in the same batch as the rest
+    session.bulk_insert_mappings(model, rows, render_nulls=True)
+    session.commit()
+
 def update_task_status(session, task_id, status, progress=None, error_message=None):
     """Update task status and progress"""
-    task = session.query(Task).filter_by(id=task_id).first()
-    if task:
-        task.status = status
-        if progress is not None:
-            task.progress_percentage = progress
-        if error_message:
-            task.error_message = error_message
-        if status == 'running' and not task.started_at:
-            task.started_at = datetime.utcnow()
-        elif status in ['completed', 'failed']:
-            task.completed_at = datetime.utcnow()
-            if task.started_at:
-                task.actual_duration = int((task.completed_at - task.started_at).total_seconds())
-        session.commit()
-        return task
-    return None
+    # A single UPDATE ... RETURNING; no SELECT and no ORM change tracking
+    now = datetime.utcnow()
+    values = {'status': status}
+    if progress is not None:
+        values['progress_percentage'] = progress
+    if error_message:
+        values['error_message'] = error_message
+    if status == 'running':
+        values['started_at'] = func.coalesce(Task.started_at, now)
+    elif status in ['completed', 'failed']:
+        values['completed_at'] = now
+        values['actual_duration'] = cast(extract('epoch', now - Task.started_at), Integer)
+    
+    stmt = update(Task).where(Task.id == task_id).values(**values).returning(Task)
+    task = session.execute(stmt).scalar_one_or_none()
+    session.commit()
+    return task
+
+def _audit_row(agent_id, action, resource_type=None, resource_id=None,
+               details=None, success=True, error_message=None,
+               ip_address=None, user_agent=None):
+    """Build an AuditLog insert row with a fixed key set"""
+    return {
+        'agent_id': agent_id,
+        'action': action,
+        'resource_type': resource_type,
+        'resource_id': str(resource_id) if resource_id else None,
+        'details': details,
+        'ip_address': ip_address,
+        # Bulk inserts skip ORM validators, so clip here too
+        'user_agent': user_agent[:USER_AGENT_MAX_LENGTH] if user_agent else user_agent,
+        'timestamp': datetime.utcnow(),
+        'success': success,
+        'error_message': error_message
+    }
 
 def log_audit_event(session, agent_id, action, resource_type=None, resource_id=None, 
-                   details=None, success=True, error_message=None):
-    """Log an audit event"""
-    audit_log = AuditLog(
-        agent_id=agent_id,
-        action=action,
-        resource_type=resource_type,
-        resource_id=str(resource_id) if resource_id else None,
-        details=details,
-        success=success,
-        error_message=error_message
-    )
+                   details=None, success=True, error_message=None,
+                   ip_address=None, user_agent=None):
+    """Log an audit event
+    
+    Sessions from a DatabaseManager buffer the event; the returned AuditLog is
+    then transient, and its id stays unset because the background flusher
+    writes the row later.
+    """
+    row = _audit_row(agent_id, action, resource_type, resource_id, details, success, error_message,
+                     ip_address, user_agent)
+    buffer = _audit_log_buffers.get(session.get_bind())
+    if buffer is not None:
+        # Written by the background flusher instead of a commit per event
+        buffer.append(row)
+        return AuditLog(**row)
+    
+    audit_log = AuditLog(**row)
     session.add(audit_log)
     session.commit()
     return audit_log
 
+def log_audit_events(session, events):
+    """Log a list of audit events in one batch"""
+    bulk_save(session, AuditLog, [_audit_row(**event) for event in events])
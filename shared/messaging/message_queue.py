@@ -2,16 +2,25 @@
 Redis-based messaging system for inter-agent communication
 """
 
+import os
 import json
 import redis
+import socket
+import asyncio
+from redis import asyncio as aioredis
 import uuid
 import time
 import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Callable, Optional, Any
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from enum import Enum
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 class MessageType(Enum):
     """Types of messages that can be sent between agents"""
     TASK_NOTIFICATION = "task_notification"
@@ -30,6 +39,25 @@ class MessagePriority(Enum):
     HIGH = 3
     URGENT = 4
 
+# Plain dict lookups are cheaper than Enum .value access and Enum(value) calls
+_MESSAGE_TYPE_VALUES = {message_type: message_type.value for message_type in MessageType}
+_MESSAGE_TYPES = {value: message_type for message_type, value in _MESSAGE_TYPE_VALUES.items()}
+_PRIORITY_VALUES = {priority: priority.value for priority in MessagePriority}
+_PRIORITIES = {value: priority for priority, value in _PRIORITY_VALUES.items()}
+
+_iso_cache = (0, '')
+
+def _now_iso() -> str:
+    """Current UTC time in ISO format, reformatted at most once per second"""
+    global _iso_cache
+    second = int(time.time())
+    cached_second, iso = _iso_cache
+    if second != cached_second:
+        # Timestamps are informational, so one-second resolution is enough
+        iso = datetime.utcfromtimestamp(second).isoformat()
+        _iso_cache = (second, iso)
+    return iso
+
 @dataclass
 class Message:
     """Message structure for inter-agent communication"""
@@ -47,17 +75,176 @@ class Message:
 
     def to_dict(self) -> Dict:
         """Convert message to dictionary for JSON serialization"""
-        data = asdict(self)
-        data['message_type'] = self.message_type.value
-        data['priority'] = self.priority.value
+        data = dict(self.__dict__)
+        data['message_type'] = _MESSAGE_TYPE_VALUES[self.message_type]
+        data['priority'] = _PRIORITY_VALUES[self.priority]
         return data
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'Message':
         """Create message from dictionary"""
-        data['message_type'] = MessageType(data['message_type'])
-        data['priority'] = MessagePriority(data['priority'])
+        data['message_type'] = _MESSAGE_TYPES[data['message_type']]
+        data['priority'] = _PRIORITIES[data['priority']]
         return cls(**data)
+    
+    def to_bytes(self) -> bytes:
+        """Serialize message to JSON bytes"""
+        if orjson is not None:
+            try:
+                # orjson walks dataclasses and enum values natively in C;
+                # int keys are stringified like the json module does
+                return orjson.dumps(self, option=orjson.OPT_NON_STR_KEYS)
+            except orjson.JSONEncodeError:
+                # e.g. integers wider than 64 bits, which the json module encodes
+                pass
+        return json.dumps(self.to_dict()).encode('utf-8')
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Message':
+        """Create message from JSON bytes"""
+        # Fixed schema: build positionally instead of mutating and splatting a dict
+        data = _loads(data)
+        return cls(
+            data['id'],
+            data['timestamp'],
+            data['source_agent'],
+            data['target_agent'],
+            _MESSAGE_TYPES[data['message_type']],
+            _PRIORITIES[data['priority']],
+            data['payload'],
+            data.get('correlation_id'),
+            data.get('expires_at'),
+            data.get('retry_count', 0),
+            data.get('max_retries', 3)
+        )
+
+def _dumps(obj) -> bytes:
+    """Encode an object as JSON bytes, with orjson when available"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(obj).encode('utf-8')
+
+def _loads(data):
+    """Decode JSON bytes, with orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+class PubSubDispatcher:
+    """Multiplexes every channel subscription over one connection and one thread"""
+    
+    RECONNECT_DELAY = 0.5
+    MAX_RECONNECT_DELAY = 30.0
+    
+    def __init__(self, redis_config: Dict[str, Any]):
+        self.redis_config = redis_config
+        self.callbacks = {}  # channel -> callbacks
+        self.loop = None
+        self.client = None
+        self.pubsub = None
+        self.listener = None
+        self.thread = None
+        self.ready = threading.Event()
+        self.start_lock = threading.Lock()
+    
+    def subscribe(self, channel: str, callback: Callable[[Dict], None]):
+        """Register a callback, subscribing the shared connection on first use of the channel"""
+        self._start()
+        callbacks = self.callbacks.setdefault(channel, [])
+        callbacks.append(callback)
+        if len(callbacks) == 1:
+            self._call(self._subscribe(channel))
+    
+    def unsubscribe(self, channel: str, callback: Callable[[Dict], None]):
+        """Remove a callback, unsubscribing once the channel has none left"""
+        callbacks = self.callbacks.get(channel, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks and self.callbacks.pop(channel, None) is not None:
+            self._call(self._unsubscribe(channel))
+    
+    def _call(self, coroutine):
+        """Run a coroutine on the loop and wait for it, or just schedule it from the loop thread"""
+        if threading.current_thread() is self.thread:
+            # Called from a callback: waiting here would deadlock the loop
+            self.loop.create_task(coroutine)
+        else:
+            asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+    
+    def _start(self):
+        """Start the event loop thread on first use"""
+        with self.start_lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+        self.ready.wait()
+    
+    def _run(self):
+        """Own the event loop and the single pubsub connection"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.client = aioredis.Redis(**self.redis_config)
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self.ready.set()
+        self.loop.run_forever()
+    
+    async def _subscribe(self, channel: str):
+        """Subscribe and make sure the listener task is running"""
+        await self.pubsub.subscribe(channel)
+        if self.listener is None or self.listener.done():
+            self.listener = self.loop.create_task(self._listen())
+    
+    async def _unsubscribe(self, channel: str):
+        """Unsubscribe the current connection from a channel"""
+        await self.pubsub.unsubscribe(channel)
+    
+    async def _listen(self):
+        """Dispatch published messages until no channels are left, reconnecting after errors"""
+        delay = self.RECONNECT_DELAY
+        while True:
+            try:
+                async for message in self.pubsub.listen():
+                    delay = self.RECONNECT_DELAY
+                    self._dispatch(message)
+                return
+            except Exception as e:
+                print(f"Error in notification listener, reconnecting: {e}")
+            
+            # Every channel shares this connection, so retry until all are back
+            while True:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+                try:
+                    await self._resubscribe()
+                    break
+                except Exception as e:
+                    print(f"Error resubscribing notification channels: {e}")
+    
+    async def _resubscribe(self):
+        """Replace the pubsub connection and subscribe it to every channel with callbacks"""
+        try:
+            await self.pubsub.reset()
+        except Exception:
+            pass
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        if self.callbacks:
+            await self.pubsub.subscribe(*self.callbacks)
+    
+    def _dispatch(self, message: Dict[str, Any]):
+        """Hand a published message to the callbacks of its channel"""
+        if message['type'] != 'message':
+            return
+        channel = message['channel']
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        for callback in list(self.callbacks.get(channel, ())):
+            try:
+                callback(_loads(message['data']))
+            except Exception as e:
+                print(f"Error processing notification: {e}")
 
 class MessageQueue:
     """Redis-based message queue for agent communication"""
@@ -69,9 +256,15 @@ class MessageQueue:
             port=redis_port,
             db=redis_db,
             password=redis_password,
-            decode_responses=True
+            # Payloads are JSON bytes, so skip the UTF-8 decode of every reply
+            decode_responses=False
         )
-        self.subscribers = {}
+        self.dispatcher = PubSubDispatcher({
+            'host': redis_host,
+            'port': redis_port,
+            'db': redis_db,
+            'password': redis_password
+        })
         self.running = False
         self.worker_thread = None
         
@@ -88,7 +281,7 @@ class MessageQueue:
         try:
             # Store message in Redis with expiration
             message_key = f"message:{message.id}"
-            message_data = json.dumps(message.to_dict())
+            message_data = message.to_bytes()
             
             # Set expiration time (default 24 hours if not specified)
             if message.expires_at:
@@ -97,27 +290,41 @@ class MessageQueue:
             else:
                 ttl = 86400  # 24 hours
             
+            # SETEX rejects a non-positive TTL; refuse before anything is
+            # queued so no id is pushed without its message body
+            if ttl <= 0:
+                print(f"Error sending message: message {message.id} has already expired")
+                return False
+            
+            # Queue every write and flush them atomically in a single roundtrip
+            pipe = self.redis_client.pipeline(transaction=True)
+            
             # Store message
-            self.redis_client.setex(message_key, ttl, message_data)
+            pipe.setex(message_key, ttl, message_data)
             
             # Add to agent's queue
             agent_queue = f"queue:{message.target_agent}"
-            self.redis_client.lpush(agent_queue, message.id)
+            pipe.lpush(agent_queue, message.id)
             
             # Add to priority queue if high priority
             if message.priority in [MessagePriority.HIGH, MessagePriority.URGENT]:
                 priority_queue = f"priority:{message.target_agent}"
-                self.redis_client.lpush(priority_queue, message.id)
+                pipe.lpush(priority_queue, message.id)
             
             # Publish notification
             channel = f"notifications:{message.target_agent}"
             notification = {
                 'message_id': message.id,
-                'message_type': message.message_type.value,
-                'priority': message.priority.value,
+                'message_type': _MESSAGE_TYPE_VALUES[message.message_type],
+                'priority': _PRIORITY_VALUES[message.priority],
                 'source_agent': message.source_agent
             }
-            self.redis_client.publish(channel, json.dumps(notification))
+            pipe.publish(channel, _dumps(notification))
+            
+            for result in pipe.execute(raise_on_error=False):
+                if isinstance(result, Exception):
+                    print(f"Error sending message: {result}")
+                    return False
             
             return True
             
@@ -128,24 +335,21 @@ class MessageQueue:
     def receive_message(self, agent_id: str, timeout: int = 1) -> Optional[Message]:
         """Receive a message from the queue"""
         try:
-            # Check priority queue first
+            # One blocking pop over both lists; Redis serves the first
+            # non-empty key in order, so the priority queue wins
             priority_queue = f"priority:{agent_id}"
-            message_id = self.redis_client.brpop(priority_queue, timeout=0.1)
-            
-            if not message_id:
-                # Check regular queue
-                agent_queue = f"queue:{agent_id}"
-                message_id = self.redis_client.brpop(agent_queue, timeout=timeout)
+            agent_queue = f"queue:{agent_id}"
+            message_id = self.redis_client.brpop([priority_queue, agent_queue], timeout=timeout)
             
             if message_id:
                 message_id = message_id[1]  # Extract the actual ID
-                message_key = f"message:{message_id}"
+                message_key = b"message:" + message_id
                 message_data = self.redis_client.get(message_key)
                 
                 if message_data:
                     # Delete message after retrieval
                     self.redis_client.delete(message_key)
-                    return Message.from_dict(json.loads(message_data))
+                    return Message.from_bytes(message_data)
             
             return None
             
@@ -153,24 +357,69 @@ class MessageQueue:
             print(f"Error receiving message: {e}")
             return None
     
+    def receive_batch(self, agent_id: str, count: int = 10) -> List[Message]:
+        """Receive up to count messages from the queue in two roundtrips"""
+        try:
+            # Oldest ids sit at the tail; claim them atomically
+            agent_queue = f"queue:{agent_id}"
+            pipe = self.redis_client.pipeline()
+            pipe.lrange(agent_queue, -count, -1)
+            pipe.ltrim(agent_queue, 0, -count - 1)
+            message_ids, _ = pipe.execute()
+            
+            if not message_ids:
+                return []
+            
+            message_keys = [b"message:" + message_id for message_id in reversed(message_ids)]
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.mget(message_keys)
+            pipe.delete(*message_keys)
+            message_data, _ = pipe.execute()
+            
+            messages = [Message.from_bytes(data) for data in message_data if data]
+            messages.sort(key=lambda message: _PRIORITY_VALUES[message.priority], reverse=True)
+            return messages
+            
+        except Exception as e:
+            print(f"Error receiving messages: {e}")
+            return []
+    
+    def ack(self, message: Message):
+        """Acknowledge a processed message"""
+        # List-backed messages are removed as soon as they are received
+        pass
+    
+    def nack(self, message: Message):
+        """Report a message whose handler failed"""
+        # List-backed messages cannot be redelivered
+        pass
+    
     def subscribe_to_notifications(self, agent_id: str, callback: Callable[[Dict], None]):
         """Subscribe to real-time notifications"""
-        channel = f"notifications:{agent_id}"
-        pubsub = self.redis_client.pubsub()
-        pubsub.subscribe(channel)
-        
-        def notification_worker():
-            for message in pubsub.listen():
-                if message['type'] == 'message':
-                    try:
-                        notification_data = json.loads(message['data'])
-                        callback(notification_data)
-                    except Exception as e:
-                        print(f"Error processing notification: {e}")
-        
-        thread = threading.Thread(target=notification_worker, daemon=True)
-        thread.start()
-        return pubsub
+        return self._subscribe(f"notifications:{agent_id}", callback)
+    
+    def subscribe_to_broadcasts(self, channel: str, callback: Callable[[Dict], None]):
+        """Subscribe to a broadcast channel"""
+        return self._subscribe(f"broadcast:{channel}", callback)
+    
+    def broadcast_fanout(self, channel: str, payload: Dict[str, Any]) -> int:
+        """Publish a payload once to every subscriber of a broadcast channel"""
+        # Not persisted: agents that are not subscribed never see it
+        try:
+            return self.redis_client.publish(f"broadcast:{channel}", _dumps(payload))
+        except Exception as e:
+            print(f"Error broadcasting message: {e}")
+            return 0
+    
+    def _subscribe(self, channel: str, callback: Callable[[Dict], None]) -> str:
+        """Run callback for every JSON message published on a channel"""
+        # All subscriptions share the dispatcher's connection and thread
+        self.dispatcher.subscribe(channel, callback)
+        return channel
+    
+    def unsubscribe(self, channel: str, callback: Callable[[Dict], None]):
+        """Stop delivering a channel's messages to callback"""
+        self.dispatcher.unsubscribe(channel, callback)
     
     def get_queue_size(self, agent_id: str) -> Dict[str, int]:
         """Get queue sizes for an agent"""
@@ -188,23 +437,186 @@ class MessageQueue:
         regular_queue = f"queue:{agent_id}"
         priority_queue = f"priority:{agent_id}"
         
-        self.redis_client.delete(regular_queue)
-        self.redis_client.delete(priority_queue)
+        self.redis_client.delete(regular_queue, priority_queue)
     
     def get_agent_status(self, agent_id: str) -> Dict[str, Any]:
         """Get status information for an agent"""
         status_key = f"status:{agent_id}"
-        status_data = self.redis_client.get(status_key)
+        status_data = self.redis_client.hgetall(status_key)
         
-        if status_data:
-            return json.loads(status_data)
-        return {}
+        return {field.decode(): _loads(value) for field, value in status_data.items()}
     
     def update_agent_status(self, agent_id: str, status: Dict[str, Any]):
         """Update status information for an agent"""
+        # A hash only rewrites the fields being updated, not the whole blob
         status_key = f"status:{agent_id}"
-        status_data = json.dumps(status)
-        self.redis_client.setex(status_key, 300, status_data)  # 5 minute TTL
+        pipe = self.redis_client.pipeline()
+        if status:
+            pipe.hset(status_key, mapping={field: _dumps(value) for field, value in status.items()})
+        pipe.expire(status_key, 300)  # 5 minute TTL
+        pipe.execute()
+
+class StreamMessageQueue(MessageQueue):
+    """Redis Streams message queue with one consumer group per agent"""
+    
+    def __init__(self, redis_host='localhost', redis_port=6379, redis_db=0, redis_password=None,
+                 consumer_name=None, stream_maxlen=100000, claim_idle_ms=60000, claim_interval=30.0):
+        """Initialize Redis connection and consumer identity"""
+        super().__init__(redis_host, redis_port, redis_db, redis_password)
+        # Stable across restarts so a restarted worker finds its own pending entries;
+        # processes sharing a host need distinct consumer_name values
+        self.consumer_name = consumer_name or os.getenv('MCP_CONSUMER_NAME') or socket.gethostname()
+        self.stream_maxlen = stream_maxlen
+        self.claim_idle_ms = claim_idle_ms
+        self.claim_interval = claim_interval
+        self.groups = set()
+        self.pending = {}  # message id -> (stream, entry id) awaiting ack
+        self.recovery_cursors = {}  # agent id -> last own pending entry redelivered, until drained
+        self.next_claim = {}  # agent id -> monotonic time of the next XAUTOCLAIM
+    
+    def _ensure_group(self, agent_id: str) -> str:
+        """Create the agent's stream and consumer group on first use"""
+        stream = f"stream:{agent_id}"
+        if agent_id not in self.groups:
+            try:
+                self.redis_client.xgroup_create(stream, agent_id, id='0', mkstream=True)
+            except redis.ResponseError as e:
+                if 'BUSYGROUP' not in str(e):
+                    raise
+            self.groups.add(agent_id)
+            self.recovery_cursors[agent_id] = '0'
+        return stream
+    
+    def _recover(self, agent_id: str, stream: str, count: int) -> List[tuple]:
+        """Redeliver entries left pending by a crash or a failed handler"""
+        # First our own pending entries from before a restart, oldest first
+        cursor = self.recovery_cursors.get(agent_id)
+        if cursor is not None:
+            response = self.redis_client.xreadgroup(
+                agent_id, self.consumer_name, {stream: cursor}, count=count
+            )
+            entries = [entry for _, stream_entries in response or [] for entry in stream_entries]
+            if entries:
+                self.recovery_cursors[agent_id] = entries[-1][0]
+                return entries
+            del self.recovery_cursors[agent_id]
+        
+        # Then entries idle for claim_idle_ms in any consumer, including our own nacks
+        now = time.monotonic()
+        if now < self.next_claim.get(agent_id, 0):
+            return []
+        self.next_claim[agent_id] = now + self.claim_interval
+        
+        claimed = self.redis_client.xautoclaim(
+            stream, agent_id, self.consumer_name, self.claim_idle_ms, start_id='0-0', count=count
+        )[1]
+        in_flight = {entry_id for _, entry_id in self.pending.values()}
+        return [entry for entry in claimed if entry[0] not in in_flight]
+    
+    def _read(self, agent_id: str, count: int, block: Optional[int]) -> List[Message]:
+        """Read recovered entries, else new entries for this consumer, highest priority first"""
+        stream = self._ensure_group(agent_id)
+        entries = self._recover(agent_id, stream, count)
+        if not entries:
+            response = self.redis_client.xreadgroup(
+                agent_id, self.consumer_name, {stream: '>'}, count=count, block=block
+            )
+            entries = [entry for _, stream_entries in response or [] for entry in stream_entries]
+        
+        messages = []
+        now = datetime.utcnow()
+        for entry_id, fields in sorted(entries, key=lambda entry: int((entry[1] or {}).get(b'prio', 0)), reverse=True):
+            if not fields:
+                # Trimmed from the stream while pending
+                self.redis_client.xack(stream, agent_id, entry_id)
+                continue
+            message = Message.from_bytes(fields[b'data'])
+            if message.expires_at and datetime.fromisoformat(message.expires_at) <= now:
+                self.redis_client.xack(stream, agent_id, entry_id)
+                continue
+            self.pending[message.id] = (stream, entry_id)
+            messages.append(message)
+        return messages
+    
+    def send_message(self, message: Message) -> bool:
+        """Append a message to the target agent's stream"""
+        try:
+            stream = f"stream:{message.target_agent}"
+            channel = f"notifications:{message.target_agent}"
+            notification = {
+                'message_id': message.id,
+                'message_type': _MESSAGE_TYPE_VALUES[message.message_type],
+                'priority': _PRIORITY_VALUES[message.priority],
+                'source_agent': message.source_agent
+            }
+            
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.xadd(
+                stream,
+                {'id': message.id, 'prio': _PRIORITY_VALUES[message.priority], 'data': message.to_bytes()},
+                maxlen=self.stream_maxlen,
+                approximate=True
+            )
+            pipe.publish(channel, _dumps(notification))
+            pipe.execute()
+            
+            return True
+            
+        except Exception as e:
+            print(f"Error sending message: {e}")
+            return False
+    
+    def receive_message(self, agent_id: str, timeout: int = 1) -> Optional[Message]:
+        """Block until a message arrives on the agent's stream"""
+        try:
+            messages = self._read(agent_id, 1, int(timeout * 1000))
+            return messages[0] if messages else None
+            
+        except Exception as e:
+            print(f"Error receiving message: {e}")
+            return None
+    
+    def receive_batch(self, agent_id: str, count: int = 10) -> List[Message]:
+        """Receive up to count messages without blocking"""
+        try:
+            return self._read(agent_id, count, None)
+            
+        except Exception as e:
+            print(f"Error receiving messages: {e}")
+            return []
+    
+    def ack(self, message: Message):
+        """Acknowledge a processed message so it leaves the pending list"""
+        entry = self.pending.pop(message.id, None)
+        if entry:
+            stream, entry_id = entry
+            self.redis_client.xack(stream, message.target_agent, entry_id)
+    
+    def nack(self, message: Message):
+        """Give up on a message; it stays pending and is redelivered once idle for claim_idle_ms"""
+        self.pending.pop(message.id, None)
+    
+    def get_queue_size(self, agent_id: str) -> Dict[str, int]:
+        """Get the number of entries not yet delivered to the agent's group"""
+        stream = self._ensure_group(agent_id)
+        lag = 0
+        for group in self.redis_client.xinfo_groups(stream):
+            name = group['name']
+            if isinstance(name, bytes):
+                name = name.decode()
+            if name == agent_id:
+                lag = group.get('lag') or 0
+        
+        return {
+            'regular': lag,
+            'priority': 0,
+            'total': lag
+        }
+    
+    def clear_queue(self, agent_id: str):
+        """Drop the agent's stream together with its consumer group"""
+        self.redis_client.delete(f"stream:{agent_id}")
+        self.groups.discard(agent_id)
 
 class AgentCommunicator:
     """High-level interface for agent communication"""
@@ -225,7 +637,7 @@ class AgentCommunicator:
         """Send a task notification to another agent"""
         message = Message(
             id=str(uuid.uuid4()),
-            timestamp=datetime.utcnow().isoformat(),
+            timestamp=_now_iso(),
             source_agent=self.agent_id,
             target_agent=target_agent,
             message_type=MessageType.TASK_NOTIFICATION,
@@ -241,7 +653,7 @@ class AgentCommunicator:
         """Send a status update to another agent"""
         message = Message(
             id=str(uuid.uuid4()),
-            timestamp=datetime.utcnow().isoformat(),
+            timestamp=_now_iso(),
             source_agent=self.agent_id,
             target_agent=target_agent,
             message_type=MessageType.STATUS_UPDATE,
@@ -255,7 +667,7 @@ class AgentCommunicator:
         """Send an error alert to another agent"""
         message = Message(
             id=str(uuid.uuid4()),
-            timestamp=datetime.utcnow().isoformat(),
+            timestamp=_now_iso(),
             source_agent=self.agent_id,
             target_agent=target_agent,
             message_type=MessageType.ERROR_ALERT,
@@ -273,7 +685,7 @@ class AgentCommunicator:
         
         message = Message(
             id=str(uuid.uuid4()),
-            timestamp=datetime.utcnow().isoformat(),
+            timestamp=_now_iso(),
             source_agent=self.agent_id,
             target_agent=target_agent,
             message_type=MessageType.DATA_REQUEST,
@@ -291,7 +703,7 @@ class AgentCommunicator:
         """Send a data response to another agent"""
         message = Message(
             id=str(uuid.uuid4()),
-            timestamp=datetime.utcnow().isoformat(),
+            timestamp=_now_iso(),
             source_agent=self.agent_id,
             target_agent=target_agent,
             message_type=MessageType.DATA_RESPONSE,
@@ -302,15 +714,29 @@ class AgentCommunicator:
         
         return self.message_queue.send_message(message)
     
+    def broadcast_event(self, message_type: MessageType, payload: Dict[str, Any]) -> int:
+        """Broadcast a non-durable event with a single PUBLISH"""
+        message_type_value = _MESSAGE_TYPE_VALUES[message_type]
+        return self.message_queue.broadcast_fanout(message_type_value, {
+            'source_agent': self.agent_id,
+            'message_type': message_type_value,
+            'timestamp': _now_iso(),
+            'payload': payload
+        })
+    
+    def subscribe_to_broadcasts(self, message_type: MessageType, callback: Callable[[Dict], None]):
+        """Receive broadcast events of one message type"""
+        return self.message_queue.subscribe_to_broadcasts(_MESSAGE_TYPE_VALUES[message_type], callback)
+    
     def broadcast_message(self, agent_list: List[str], message_type: MessageType, 
                          payload: Dict[str, Any], priority: MessagePriority = MessagePriority.NORMAL):
-        """Broadcast a message to multiple agents"""
+        """Broadcast a durable message to each agent's queue"""
         message_ids = []
         
         for target_agent in agent_list:
             message = Message(
                 id=str(uuid.uuid4()),
-                timestamp=datetime.utcnow().isoformat(),
+                timestamp=_now_iso(),
                 source_agent=self.agent_id,
                 target_agent=target_agent,
                 message_type=message_type,
@@ -331,9 +757,15 @@ class AgentCommunicator:
             while self.running:
                 try:
                     message = self.message_queue.receive_message(self.agent_id, timeout=1)
-                    if message and message.message_type in self.message_handlers:
-                        handler = self.message_handlers[message.message_type]
-                        handler(message)
+                    if message:
+                        try:
+                            if message.message_type in self.message_handlers:
+                                handler = self.message_handlers[message.message_type]
+                                handler(message)
+                        except Exception:
+                            self.message_queue.nack(message)
+                            raise
+                        self.message_queue.ack(message)
                 except Exception as e:
                     print(f"Error processing message: {e}")
         
@@ -349,11 +781,11 @@ class AgentCommunicator:
     def update_status(self, status: Dict[str, Any]):
         """Update this agent's status"""
         status['agent_id'] = self.agent_id
-        status['last_updated'] = datetime.utcnow().isoformat()
+        status['last_updated'] = _now_iso()
         self.message_queue.update_agent_status(self.agent_id, status)
 
 # Utility functions for common messaging patterns
-def create_message_queue(redis_config: Dict[str, Any] = None) -> MessageQueue:
+def create_message_queue(redis_config: Dict[str, Any] = None, use_streams: bool = False) -> MessageQueue:
     """Create a message queue with default or custom Redis configuration"""
     if redis_config is None:
         redis_config = {
@@ -362,6 +794,8 @@ def create_message_queue(redis_config: Dict[str, Any] = None) -> MessageQueue:
             'redis_db': 0
         }
     
+    if use_streams:
+        return StreamMessageQueue(**redis_config)
     return MessageQueue(**redis_config)
 
 def create_agent_communicator(agent_id: str, redis_config: Dict[str, Any] = None) -> AgentCommunicator:
@@ -3,14 +3,24 @@ Common utility functions for the Multi-Agent MCP System
 """
 
 import os
+import re
+import atexit
+import copy
+import errno
 import hashlib
 import json
 import logging
+import logging.handlers
 import mimetypes
+import mmap
+import queue
 import shutil
 import tempfile
 import uuid
 from datetime import datetime, timedelta
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Union, Tuple
 from urllib.parse import urlparse, urljoin
@@ -18,7 +28,40 @@ import requests
 from PIL import Image
 import magic
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+# One libmagic cookie for the process instead of reloading the database per lookup
+try:
+    _MAGIC = magic.Magic(mime=True)
+except Exception:
+    _MAGIC = None
+
 # Logging setup
+# File handlers run on one QueueListener thread per agent, stopped at exit to drain queued records
+_log_listeners: Dict[str, logging.handlers.QueueListener] = {}
+
+def stop_logging(agent_id: str):
+    """Flush and stop the background file logging thread for an agent"""
+    listener = _log_listeners.pop(agent_id, None)
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+@atexit.register
+def _stop_all_logging():
+    """Stop every background file logging thread"""
+    for agent_id in list(_log_listeners):
+        stop_logging(agent_id)
+
 def setup_logging(agent_id: str, log_level: str = "INFO", log_file: Optional[str] = None) -> logging.Logger:
     """Set up logging for an agent"""
     logger = logging.getLogger(agent_id)
@@ -27,6 +70,7 @@ def setup_logging(agent_id: str, log_level: str = "INFO", log_file: Optional[str
     # Remove existing handlers
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
+    stop_logging(agent_id)
     
     # Create formatter
     formatter = logging.Formatter(
@@ -43,53 +87,133 @@ def setup_logging(agent_id: str, log_level: str = "INFO", log_file: Optional[str
         os.makedirs(os.path.dirname(log_file), exist_ok=True)
         file_handler = logging.FileHandler(log_file)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        
+        # Callers only enqueue; disk writes happen on the listener thread
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+        listener.start()
+        _log_listeners[agent_id] = listener
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
     
     return logger
 
 # File utilities
-def calculate_file_hash(file_path: str, algorithm: str = "sha256") -> str:
+HASH_CHUNK_SIZE = 1 << 20
+MMAP_HASH_THRESHOLD = 16 << 20
+
+# Stored content hashes are bare SHA-256 digests, so switching the default
+# needs a migration that rehashes existing rows; MCP_HASH_ALGO=blake3 opts in
+HASH_ALGO = os.getenv('MCP_HASH_ALGO') or 'sha256'
+
+def _require_blake3():
+    """Fail clearly when BLAKE3 hashing is requested without the blake3 package"""
+    if blake3 is None:
+        raise ImportError("BLAKE3 hashing requires the blake3 package (pip install blake3)")
+
+if HASH_ALGO == 'blake3':
+    _require_blake3()
+
+def _new_hash(algorithm: str):
+    """Create an incremental hasher for the given algorithm"""
+    if algorithm == 'blake3':
+        _require_blake3()
+        return blake3.blake3()
+    return hashlib.new(algorithm)
+
+def calculate_file_hash(file_path: str, algorithm: Optional[str] = None) -> str:
     """Calculate hash of a file"""
-    hash_func = hashlib.new(algorithm)
-    
-    with open(file_path, 'rb') as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_func.update(chunk)
+    algorithm = algorithm or HASH_ALGO
+    if algorithm == 'blake3':
+        _require_blake3()
+        # Memory-maps the file and hashes it across all cores
+        return blake3.blake3(max_threads=blake3.blake3.AUTO).update_mmap(file_path).hexdigest()
+    
+    with open(file_path, 'rb', buffering=0) as f:
+        if os.fstat(f.fileno()).st_size >= MMAP_HASH_THRESHOLD:
+            # Hash straight out of the page cache instead of copying into Python buffers
+            hash_func = hashlib.new(algorithm)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                hash_func.update(mm)
+            return hash_func.hexdigest()
+        
+        if hasattr(hashlib, 'file_digest'):
+            # Python 3.11+: the read/update loop runs in C
+            return hashlib.file_digest(f, algorithm).hexdigest()
+        
+        hash_func = hashlib.new(algorithm)
+        
+        # Read 1 MiB at a time into one reused buffer
+        buffer = bytearray(HASH_CHUNK_SIZE)
+        view = memoryview(buffer)
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            hash_func.update(view[:size])
     
     return hash_func.hexdigest()
 
-def get_file_info(file_path: str) -> Dict[str, Any]:
+def _stat_info(path: Path, stat: os.stat_result) -> Dict[str, Any]:
+    """Build the stat-derived part of the file information"""
+    return {
+        'path': str(path.absolute()),
+        'name': path.name,
+        'stem': path.stem,
+        'suffix': path.suffix,
+        'size': stat.st_size,
+        'created': datetime.fromtimestamp(stat.st_ctime).isoformat(),
+        'modified': datetime.fromtimestamp(stat.st_mtime).isoformat()
+    }
+
+def get_file_stat(file_path: str) -> Dict[str, Any]:
+    """Get cheap file information from a single stat call"""
+    path = Path(file_path)
+    return _stat_info(path, path.stat())
+
+def calculate_file_hashes(file_paths: List[str], algorithm: Optional[str] = None,
+                          max_workers: Optional[int] = None) -> Dict[str, str]:
+    """Calculate hashes of many files in parallel"""
+    # hashlib releases the GIL while digesting, so threads scale across cores
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        digests = executor.map(lambda file_path: calculate_file_hash(file_path, algorithm), file_paths)
+        return dict(zip(file_paths, digests))
+
+def get_file_info(file_path: str, include_hash: bool = True, include_image: bool = True) -> Dict[str, Any]:
     """Get comprehensive file information"""
     path = Path(file_path)
-    
-    if not path.exists():
-        raise FileNotFoundError(f"File not found: {file_path}")
-    
     stat = path.stat()
     
+    # ctime changes on every write and cannot be set back from userland (unlike
+    # mtime via cp -p, rsync or os.utime); the inode catches replaced files
+    info = _file_info_cached(str(path.absolute()), stat.st_ino, stat.st_ctime_ns,
+                             stat.st_mtime_ns, stat.st_size, include_hash, include_image)
+    return copy.deepcopy(info)
+
+@lru_cache(maxsize=4096)
+def _file_info_cached(file_path: str, inode: int, ctime_ns: int, mtime_ns: int, size: int,
+                      include_hash: bool, include_image: bool) -> Dict[str, Any]:
+    """Build file information, including MIME type and hash, once per file version"""
+    path = Path(file_path)
+    info = _stat_info(path, path.stat())
+    
     # Get MIME type
     mime_type, _ = mimetypes.guess_type(file_path)
     if not mime_type:
         # Fallback to python-magic for better detection
         try:
-            mime_type = magic.from_file(file_path, mime=True)
+            mime_type = _MAGIC.from_file(file_path)
         except:
             mime_type = "application/octet-stream"
     
-    info = {
-        'path': str(path.absolute()),
-        'name': path.name,
-        'stem': path.stem,
-        'suffix': path.suffix,
-        'size': stat.st_size,
-        'created': datetime.fromtimestamp(stat.st_ctime).isoformat(),
-        'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-        'mime_type': mime_type,
-        'hash': calculate_file_hash(file_path)
-    }
+    info['mime_type'] = mime_type
+    if include_hash:
+        info['hash'] = calculate_file_hash(file_path)
+        info['hash_algo'] = HASH_ALGO
     
     # Additional info for images
-    if mime_type.startswith('image/'):
+    if include_image and mime_type.startswith('image/'):
         try:
             with Image.open(file_path) as img:
                 info['image_info'] = {
@@ -108,11 +232,16 @@ def ensure_directory(directory: str) -> str:
     Path(directory).mkdir(parents=True, exist_ok=True)
     return directory
 
+SAFE_FILENAME_CHARS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_."
+_SAFE_FILENAME_TABLE = {i: ord('_') for i in range(128) if chr(i) not in SAFE_FILENAME_CHARS}
+_NON_ASCII_RE = re.compile(r'[^\x00-\x7f]')
+
 def safe_filename(filename: str) -> str:
     """Create a safe filename by removing/replacing problematic characters"""
     # Remove or replace problematic characters
-    safe_chars = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_."
-    safe_name = ''.join(c if c in safe_chars else '_' for c in filename)
+    safe_name = filename.translate(_SAFE_FILENAME_TABLE)
+    if not safe_name.isascii():
+        safe_name = _NON_ASCII_RE.sub('_', safe_name)
     
     # Ensure it doesn't start with a dot
     if safe_name.startswith('.'):
@@ -125,34 +254,76 @@ def safe_filename(filename: str) -> str:
     
     return safe_name
 
+def _create_unique_file(directory: str, filename: str) -> Tuple[str, int]:
+    """Atomically create a new file, appending _1, _2, ... to the name on conflicts"""
+    # O_EXCL creation checks and reserves the name in one race-free syscall
+    name, ext = os.path.splitext(filename)
+    dest_path = os.path.join(directory, filename)
+    counter = 1
+    while True:
+        try:
+            return dest_path, os.open(dest_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        except FileExistsError:
+            dest_path = os.path.join(directory, f"{name}_{counter}{ext}")
+            counter += 1
+
+def _copy_file(source_path: str, dest_path: str, dest_fd: int):
+    """Copy file data and metadata into a newly created file, in the kernel when possible"""
+    copied_in_kernel = False
+    # Wrap the descriptor first so it is closed even if the source can't be opened
+    with os.fdopen(dest_fd, 'wb') as dst, open(source_path, 'rb') as src:
+        if hasattr(os, 'copy_file_range'):
+            # No user-space copy, and a reflink on copy-on-write filesystems
+            try:
+                remaining = os.fstat(src.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                copied_in_kernel = True
+            except OSError as e:
+                # Cross-device or unsupported filesystem: use the portable path
+                if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.EINVAL):
+                    raise
+    
+    if copied_in_kernel:
+        shutil.copystat(source_path, dest_path)
+    else:
+        shutil.copy2(source_path, dest_path)
+
 def copy_file_to_storage(source_path: str, storage_dir: str, 
                         preserve_name: bool = True) -> Tuple[str, Dict[str, Any]]:
     """Copy file to storage directory and return new path and metadata"""
     ensure_directory(storage_dir)
     
-    source_info = get_file_info(source_path)
+    # Naming only needs the stat data; hashing waits until the copy succeeded
+    source_stat = get_file_stat(source_path)
     
     if preserve_name:
-        filename = safe_filename(source_info['name'])
+        filename = safe_filename(source_stat['name'])
     else:
         # Generate unique filename
         file_id = str(uuid.uuid4())
-        extension = source_info['suffix']
+        extension = source_stat['suffix']
         filename = f"{file_id}{extension}"
     
     # Handle filename conflicts
-    dest_path = os.path.join(storage_dir, filename)
-    counter = 1
-    while os.path.exists(dest_path):
-        name, ext = os.path.splitext(filename)
-        dest_path = os.path.join(storage_dir, f"{name}_{counter}{ext}")
-        counter += 1
+    dest_path, dest_fd = _create_unique_file(storage_dir, filename)
     
-    # Copy file
-    shutil.copy2(source_path, dest_path)
+    # Copy file, releasing the reserved name if the copy fails
+    try:
+        _copy_file(source_path, dest_path, dest_fd)
+    except BaseException:
+        try:
+            os.unlink(dest_path)
+        except OSError:
+            pass
+        raise
     
-    # Update metadata with new path
-    dest_info = get_file_info(dest_path)
+    # The copy is byte-identical, so reuse the source hash and MIME data
+    # and only refresh what depends on the new path
+    dest_info = {**get_file_info(source_path), **get_file_stat(dest_path)}
     dest_info['original_path'] = source_path
     dest_info['copied_at'] = datetime.utcnow().isoformat()
     
@@ -176,6 +347,29 @@ def normalize_url(url: str, base_url: str = None) -> str:
     parsed = urlparse(url)
     return parsed._replace(fragment='').geturl()
 
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_FLUSH_SIZE = 1 << 20
+
+def _write_buffers(f, buffers: List[bytes]):
+    """Write a list of buffers with as few syscalls as possible"""
+    if not buffers:
+        return
+    if not hasattr(os, 'writev'):
+        data = memoryview(b''.join(buffers))
+        while data:
+            data = data[f.write(data):]
+        return
+    
+    views = [memoryview(buffer) for buffer in buffers]
+    while views:
+        written = os.writev(f.fileno(), views)
+        # Drop fully written buffers and trim a partially written one
+        while views and written >= len(views[0]):
+            written -= len(views[0])
+            views.pop(0)
+        if views and written:
+            views[0] = views[0][written:]
+
 def download_file(url: str, dest_dir: str, filename: str = None, 
                  timeout: int = 30, headers: Dict[str, str] = None) -> Tuple[str, Dict[str, Any]]:
     """Download file from URL and save to destination directory"""
@@ -203,20 +397,28 @@ def download_file(url: str, dest_dir: str, filename: str = None,
     filename = safe_filename(filename)
     
     # Handle filename conflicts
-    dest_path = os.path.join(dest_dir, filename)
-    counter = 1
-    while os.path.exists(dest_path):
-        name, ext = os.path.splitext(filename)
-        dest_path = os.path.join(dest_dir, f"{name}_{counter}{ext}")
-        counter += 1
-    
-    # Download file
-    with open(dest_path, 'wb') as f:
-        for chunk in response.iter_content(chunk_size=8192):
-            f.write(chunk)
+    dest_path, dest_fd = _create_unique_file(dest_dir, filename)
+    
+    # Download file, flushing up to 16 chunks per write syscall and
+    # hashing each chunk on the way so the file is never re-read
+    hash_func = _new_hash(HASH_ALGO)
+    with os.fdopen(dest_fd, 'wb', buffering=0) as f:
+        pending = []
+        pending_size = 0
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            hash_func.update(chunk)
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if len(pending) >= 16 or pending_size >= DOWNLOAD_FLUSH_SIZE:
+                _write_buffers(f, pending)
+                pending = []
+                pending_size = 0
+        _write_buffers(f, pending)
     
     # Get file info
-    file_info = get_file_info(dest_path)
+    file_info = get_file_info(dest_path, include_hash=False)
+    file_info['hash'] = hash_func.hexdigest()
+    file_info['hash_algo'] = HASH_ALGO
     file_info['source_url'] = url
     file_info['downloaded_at'] = datetime.utcnow().isoformat()
     file_info['content_type'] = response.headers.get('Content-Type')
@@ -225,47 +427,88 @@ def download_file(url: str, dest_dir: str, filename: str = None,
     return dest_path, file_info
 
 # Data utilities
+def _json_fallback(obj):
+    """Serialize the types JSON encoders do not handle natively"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    elif isinstance(obj, Path):
+        return str(obj)
+    elif hasattr(obj, '__dict__'):
+        return obj.__dict__
+    raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+
 def serialize_data(data: Any) -> str:
-    """Serialize data to JSON string with datetime handling"""
-    def json_serializer(obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        elif isinstance(obj, Path):
-            return str(obj)
-        elif hasattr(obj, '__dict__'):
-            return obj.__dict__
-        raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
-    
-    return json.dumps(data, default=json_serializer, indent=2)
+    """Serialize data to JSON string with datetime handling
+    
+    With orjson installed, non-ASCII text is written as raw UTF-8 instead of
+    \\u escapes, and NaN/Infinity become null. Values orjson rejects, such as
+    integers wider than 64 bits or lone surrogates, use the json module.
+    """
+    if orjson is not None:
+        try:
+            # datetimes, dataclasses and numpy arrays are encoded natively
+            return orjson.dumps(
+                data,
+                default=_json_fallback,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            ).decode('utf-8')
+        except orjson.JSONEncodeError:
+            pass
+    
+    return json.dumps(data, default=_json_fallback, indent=2)
 
 def deserialize_data(json_str: str) -> Any:
     """Deserialize JSON string to Python object"""
+    if orjson is not None:
+        try:
+            return orjson.loads(json_str)
+        except orjson.JSONDecodeError:
+            # NaN/Infinity written by the json module, or lone surrogates
+            pass
     return json.loads(json_str)
 
 def merge_dicts(dict1: Dict, dict2: Dict) -> Dict:
     """Recursively merge two dictionaries"""
     result = dict1.copy()
     
-    for key, value in dict2.items():
-        if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-            result[key] = merge_dicts(result[key], value)
-        else:
-            result[key] = value
+    # Walk nested levels with an explicit stack instead of recursive calls;
+    # only sub-dicts that are actually merged get copied
+    stack = [(result, dict2)]
+    while stack:
+        target, source = stack.pop()
+        for key, value in source.items():
+            current = target.get(key)
+            if isinstance(current, dict) and isinstance(value, dict):
+                merged = current.copy()
+                target[key] = merged
+                stack.append((merged, value))
+            else:
+                target[key] = value
     
     return result
 
 def flatten_dict(d: Dict, parent_key: str = '', sep: str = '.') -> Dict:
     """Flatten a nested dictionary"""
-    items = []
-    for k, v in d.items():
-        new_key = f"{parent_key}{sep}{k}" if parent_key else k
-        if isinstance(v, dict):
-            items.extend(flatten_dict(v, new_key, sep=sep).items())
+    flat = {}
+    
+    # Depth-first over a stack of item iterators, keeping the original key order
+    stack = [(parent_key, iter(d.items()))]
+    while stack:
+        prefix, items = stack[-1]
+        for k, v in items:
+            new_key = f"{prefix}{sep}{k}" if prefix else k
+            if isinstance(v, dict):
+                stack.append((new_key, iter(v.items())))
+                break
+            flat[new_key] = v
         else:
-            items.append((new_key, v))
-    return dict(items)
+            stack.pop()
+    
+    return flat
 
 # Text processing utilities
+_CONTROL_CHAR_TABLE = dict.fromkeys(i for i in range(32) if chr(i) not in '\n\t')
+
 def clean_text(text: str) -> str:
     """Clean and normalize text"""
     if not text:
@@ -275,7 +518,7 @@ def clean_text(text: str) -> str:
     text = ' '.join(text.split())
     
     # Remove control characters
-    text = ''.join(char for char in text if ord(char) >= 32 or char in '\n\t')
+    text = text.translate(_CONTROL_CHAR_TABLE)
     
     return text.strip()
 
@@ -286,45 +529,40 @@ def truncate_text(text: str, max_length: int, suffix: str = "...") -> str:
     
     return text[:max_length - len(suffix)] + suffix
 
+_KEYWORD_PUNCTUATION = '.,!?;:"()[]{}'
+
+# Common stop words
+_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have',
+    'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should',
+    'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those'
+})
+
 def extract_keywords(text: str, max_keywords: int = 10) -> List[str]:
     """Extract keywords from text (simple implementation)"""
     # This is a basic implementation - in production, you might want to use
     # more sophisticated NLP libraries like spaCy or NLTK
     
-    # Common stop words
-    stop_words = {
-        'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-        'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have',
-        'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should',
-        'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those'
-    }
-    
     # Simple keyword extraction
-    words = text.lower().split()
-    words = [word.strip('.,!?;:"()[]{}') for word in words]
-    words = [word for word in words if len(word) > 2 and word not in stop_words]
-    
-    # Count frequency
-    word_freq = {}
-    for word in words:
-        word_freq[word] = word_freq.get(word, 0) + 1
+    words = [word.strip(_KEYWORD_PUNCTUATION) for word in text.lower().split()]
+    words = [word for word in words if len(word) > 2 and word not in _STOP_WORDS]
     
-    # Sort by frequency and return top keywords
-    sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-    return [word for word, freq in sorted_words[:max_keywords]]
+    # Count frequency and return top keywords
+    return [word for word, freq in Counter(words).most_common(max_keywords)]
 
 # Validation utilities
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_NON_DIGIT_RE = re.compile(r'\D')
+
 def validate_email(email: str) -> bool:
     """Validate email address format"""
-    import re
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+    return _EMAIL_RE.match(email) is not None
 
 def validate_phone(phone: str) -> bool:
     """Validate phone number format"""
-    import re
     # Remove all non-digit characters
-    digits = re.sub(r'\D', '', phone)
+    digits = _NON_DIGIT_RE.sub('', phone)
     # Check if it's a valid length (7-15 digits)
     return 7 <= len(digits) <= 15
 
@@ -422,12 +660,14 @@ def create_temp_file(suffix: str = '', prefix: str = 'mcp_', content: str = None
 
 def cleanup_temp_files(file_paths: List[str]):
     """Clean up temporary files"""
+    logger = logging.getLogger(__name__)
     for file_path in file_paths:
+        # One unlink per file; a missing file is already cleaned up
         try:
-            if os.path.exists(file_path):
-                os.unlink(file_path)
-        except Exception as e:
-            logger = logging.getLogger(__name__)
+            os.unlink(file_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
             logger.warning(f"Failed to cleanup temp file {file_path}: {e}")
 
 # Error handling utilities
@@ -4,10 +4,16 @@ Configuration management for the Multi-Agent MCP System
 
 import os
 import json
-import yaml
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from operator import attrgetter
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field, fields
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 @dataclass
 class DatabaseConfig:
@@ -64,6 +70,15 @@ class TransformationConfig:
     max_field_mappings: int = 50
     learning_rate: float = 0.1
 
+def _default_agents() -> Dict[str, AgentConfig]:
+    """Build the default per-agent configurations"""
+    return {
+        "agent1_scraper": AgentConfig("Web Scraper & Data Collector"),
+        "agent2_knowledge": AgentConfig("Knowledge Base Creator"),
+        "agent3_database": AgentConfig("Database Manager"),
+        "agent4_transformer": AgentConfig("Intelligent Data Transformer")
+    }
+
 @dataclass
 class SystemConfig:
     """Main system configuration"""
@@ -73,25 +88,83 @@ class SystemConfig:
     secret_key: str = "your-secret-key-here"
     api_host: str = "0.0.0.0"
     api_port: int = 8000
+    openai_api_key: Optional[str] = None
+    openai_api_base: Optional[str] = None
     
     # Component configurations
-    database: DatabaseConfig = DatabaseConfig()
-    redis: RedisConfig = RedisConfig()
-    scraping: ScrapingConfig = ScrapingConfig()
-    knowledge: KnowledgeConfig = KnowledgeConfig()
-    transformation: TransformationConfig = TransformationConfig()
+    database: DatabaseConfig = field(default_factory=DatabaseConfig)
+    redis: RedisConfig = field(default_factory=RedisConfig)
+    scraping: ScrapingConfig = field(default_factory=ScrapingConfig)
+    knowledge: KnowledgeConfig = field(default_factory=KnowledgeConfig)
+    transformation: TransformationConfig = field(default_factory=TransformationConfig)
     
     # Agent configurations
-    agents: Dict[str, AgentConfig] = None
+    agents: Dict[str, AgentConfig] = field(default_factory=_default_agents)
+
+_ENV_MAPPINGS = {
+    'MCP_ENVIRONMENT': 'environment',
+    'MCP_DEBUG': 'debug',
+    'MCP_LOG_LEVEL': 'log_level',
+    'MCP_SECRET_KEY': 'secret_key',
+    'MCP_API_HOST': 'api_host',
+    'MCP_API_PORT': 'api_port',
+    
+    # Database
+    'MCP_DATABASE_URL': 'database.url',
+    'MCP_DATABASE_ECHO': 'database.echo',
+    
+    # Redis
+    'MCP_REDIS_HOST': 'redis.host',
+    'MCP_REDIS_PORT': 'redis.port',
+    'MCP_REDIS_DB': 'redis.db',
+    'MCP_REDIS_PASSWORD': 'redis.password',
+    
+    # OpenAI
+    'OPENAI_API_KEY': 'openai_api_key',
+    'OPENAI_API_BASE': 'openai_api_base',
+}
+
+def _parse_bool(value: str) -> bool:
+    """Parse a boolean environment variable"""
+    return value.lower() in ('true', '1', 'yes', 'on')
+
+_ENV_COERCERS = {bool: _parse_bool, int: int, float: float}
+
+def _build_env_dispatch(mappings: Dict[str, str]) -> Tuple[Tuple[str, Callable, str, Callable], ...]:
+    """Resolve env var config paths to (env var, parent getter, attribute, coercer) once"""
+    dispatch = []
+    for env_var, config_path in mappings.items():
+        *parents, attr = config_path.split('.')
+        
+        # The schema is static, so field types pick the coercer up front
+        config_class = SystemConfig
+        for part in parents:
+            config_class = {f.name: f.type for f in fields(config_class)}[part]
+        field_type = {f.name: f.type for f in fields(config_class)}[attr]
+        
+        get_parent = attrgetter('.'.join(parents)) if parents else (lambda config: config)
+        dispatch.append((env_var, get_parent, attr, _ENV_COERCERS.get(field_type, str)))
+    
+    return tuple(dispatch)
+
+_ENV_DISPATCH = _build_env_dispatch(_ENV_MAPPINGS)
+
+@lru_cache(maxsize=1)
+def _find_config_file_cached() -> Optional[str]:
+    """Find configuration file in standard locations, once per process"""
+    possible_locations = [
+        "config.yaml",
+        "config.yml",
+        "config.json",
+        "/etc/multi_agent_mcp/config.yaml",
+        os.path.expanduser("~/.multi_agent_mcp/config.yaml")
+    ]
     
-    def __post_init__(self):
-        if self.agents is None:
-            self.agents = {
-                "agent1_scraper": AgentConfig("Web Scraper & Data Collector"),
-                "agent2_knowledge": AgentConfig("Knowledge Base Creator"),
-                "agent3_database": AgentConfig("Database Manager"),
-                "agent4_transformer": AgentConfig("Intelligent Data Transformer")
-            }
+    for location in possible_locations:
+        if os.path.exists(location):
+            return location
+    
+    return None
 
 class ConfigManager:
     """Manages system configuration from multiple sources"""
@@ -103,19 +176,7 @@ class ConfigManager:
     
     def _find_config_file(self) -> Optional[str]:
         """Find configuration file in standard locations"""
-        possible_locations = [
-            "config.yaml",
-            "config.yml",
-            "config.json",
-            "/etc/multi_agent_mcp/config.yaml",
-            os.path.expanduser("~/.multi_agent_mcp/config.yaml")
-        ]
-        
-        for location in possible_locations:
-            if os.path.exists(location):
-                return location
-        
-        return None
+        return _find_config_file_cached()
     
     def _load_config(self):
         """Load configuration from file and environment variables"""
@@ -131,6 +192,8 @@ class ConfigManager:
         try:
             with open(self.config_file, 'r') as f:
                 if self.config_file.endswith(('.yaml', '.yml')):
+                    # Only YAML configs pay for importing PyYAML
+                    import yaml
                     data = yaml.safe_load(f)
                 else:
                     data = json.load(f)
@@ -142,33 +205,10 @@ class ConfigManager:
     
     def _load_from_env(self):
         """Load configuration from environment variables"""
-        env_mappings = {
-            'MCP_ENVIRONMENT': 'environment',
-            'MCP_DEBUG': 'debug',
-            'MCP_LOG_LEVEL': 'log_level',
-            'MCP_SECRET_KEY': 'secret_key',
-            'MCP_API_HOST': 'api_host',
-            'MCP_API_PORT': 'api_port',
-            
-            # Database
-            'MCP_DATABASE_URL': 'database.url',
-            'MCP_DATABASE_ECHO': 'database.echo',
-            
-            # Redis
-            'MCP_REDIS_HOST': 'redis.host',
-            'MCP_REDIS_PORT': 'redis.port',
-            'MCP_REDIS_DB': 'redis.db',
-            'MCP_REDIS_PASSWORD': 'redis.password',
-            
-            # OpenAI
-            'OPENAI_API_KEY': 'openai_api_key',
-            'OPENAI_API_BASE': 'openai_api_base',
-        }
-        
-        for env_var, config_path in env_mappings.items():
-            value = os.getenv(env_var)
+        for env_var, get_parent, attr, cast in _ENV_DISPATCH:
+            value = os.environ.get(env_var)
             if value is not None:
-                self._set_nested_config(config_path, value)
+                setattr(get_parent(self.config), attr, cast(value))
     
     def _update_config_from_dict(self, data: Dict[str, Any]):
         """Update configuration from dictionary"""
@@ -183,33 +223,6 @@ class ConfigManager:
                 else:
                     setattr(self.config, key, value)
     
-    def _set_nested_config(self, path: str, value: str):
-        """Set nested configuration value from dot-separated path"""
-        parts = path.split('.')
-        obj = self.config
-        
-        # Navigate to the parent object
-        for part in parts[:-1]:
-            if hasattr(obj, part):
-                obj = getattr(obj, part)
-            else:
-                return
-        
-        # Set the final value with type conversion
-        final_key = parts[-1]
-        if hasattr(obj, final_key):
-            current_value = getattr(obj, final_key)
-            
-            # Convert string value to appropriate type
-            if isinstance(current_value, bool):
-                value = value.lower() in ('true', '1', 'yes', 'on')
-            elif isinstance(current_value, int):
-                value = int(value)
-            elif isinstance(current_value, float):
-                value = float(value)
-            
-            setattr(obj, final_key, value)
-    
     def get_config(self) -> SystemConfig:
         """Get the current configuration"""
         return self.config
@@ -226,25 +239,22 @@ class ConfigManager:
         config_dict = self._config_to_dict()
         
         try:
-            with open(file_path, 'w') as f:
-                if file_path.endswith(('.yaml', '.yml')):
+            if file_path.endswith(('.yaml', '.yml')):
+                import yaml
+                with open(file_path, 'w') as f:
                     yaml.dump(config_dict, f, default_flow_style=False)
-                else:
+            elif orjson is not None:
+                with open(file_path, 'wb') as f:
+                    f.write(orjson.dumps(config_dict, option=orjson.OPT_INDENT_2))
+            else:
+                with open(file_path, 'w') as f:
                     json.dump(config_dict, f, indent=2)
         except Exception as e:
             print(f"Error saving config to {file_path}: {e}")
     
     def _config_to_dict(self) -> Dict[str, Any]:
         """Convert configuration to dictionary"""
-        def obj_to_dict(obj):
-            if hasattr(obj, '__dict__'):
-                return {k: obj_to_dict(v) for k, v in obj.__dict__.items()}
-            elif isinstance(obj, dict):
-                return {k: obj_to_dict(v) for k, v in obj.items()}
-            else:
-                return obj
-        
-        return obj_to_dict(self.config)
+        return asdict(self.config)
     
     def validate_config(self) -> List[str]:
         """Validate configuration and return list of errors"""
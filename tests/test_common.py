@@ -0,0 +1,54 @@
+"""
+Tests for shared.utils.common serialization and file helpers
+"""
+
+import os
+import json
+import math
+from datetime import datetime
+
+import pytest
+
+from shared.utils import common
+from shared.utils.common import serialize_data, deserialize_data, copy_file_to_storage
+
+def test_round_trip():
+    data = {'name': 'café', 'items': [1, 2.5, None, True], 'at': datetime(2024, 1, 2, 3, 4, 5)}
+    assert deserialize_data(serialize_data(data)) == {**data, 'at': '2024-01-02T03:04:05'}
+
+def test_non_str_keys():
+    assert deserialize_data(serialize_data({1: 'a'})) == {'1': 'a'}
+
+def test_wide_integers():
+    assert deserialize_data(serialize_data({'big': 1 << 70})) == {'big': 1 << 70}
+
+def test_lone_surrogates():
+    assert deserialize_data(serialize_data({'text': '\ud800'})) == {'text': '\ud800'}
+
+@pytest.mark.parametrize('value', [float('nan'), float('inf'), float('-inf')])
+def test_reads_non_finite_floats_written_by_json(value):
+    stored = json.dumps({'value': value}, indent=2)
+    result = deserialize_data(stored)['value']
+    assert math.isnan(result) if math.isnan(value) else result == value
+
+def test_unserializable_objects_raise_type_error():
+    with pytest.raises(TypeError):
+        serialize_data({'value': object.__new__(type('Opaque', (), {'__slots__': ()}))})
+
+def test_copy_file_to_storage(tmp_path):
+    source = tmp_path / 'report.txt'
+    source.write_text('data')
+    dest_path, info = copy_file_to_storage(str(source), str(tmp_path / 'store'))
+    assert open(dest_path).read() == 'data'
+    assert info['original_path'] == str(source)
+
+def test_failed_copy_releases_reserved_name(tmp_path, monkeypatch):
+    source = tmp_path / 'report.txt'
+    source.write_text('data')
+    def failing_copy(source_path, dest_path, dest_fd):
+        os.close(dest_fd)
+        raise OSError('disk full')
+    monkeypatch.setattr(common, '_copy_file', failing_copy)
+    with pytest.raises(OSError):
+        copy_file_to_storage(str(source), str(tmp_path / 'store'))
+    assert list((tmp_path / 'store').iterdir()) == []